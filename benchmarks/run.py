@@ -0,0 +1,640 @@
+"""Offline benchmarks for the Vrijeme HR integration.
+
+Runs against the recorded feeds in ``benchmarks/fixtures``, served by a
+local stand-in HTTP server, and prints the results as JSON:
+
+    python benchmarks/run.py [--output results.json] [--baseline old.json] [--runs N]
+
+The parse benchmarks only need the standard library. The forecast parse is
+also checked against what its fixture, laid out the way ``forecast.py``
+expects the DHMZ forecast feed, must produce; a failed check exits with 1. The import benchmarks
+time a cold import of the modules in fresh interpreters: the data modules
+always, the integration and its platforms only with ``homeassistant``
+installed. The poll benchmarks (setup time, fetch-to-state latency, event
+loop blocking, peak memory and state writes per poll at 1, 10 and 100
+configured cities) set up one stored config entry per city in a bare Home
+Assistant, and are skipped unless ``homeassistant`` is installed. So is
+the reload check: ten entries are polled twice, unloaded and set up again,
+and their sensors' ``min_24h``/``max_24h`` attributes must not change; a
+failed check exits with 1.
+
+With ``--baseline``, every metric that got worse than the baseline by more
+than ``--threshold`` (``--time-threshold`` for timings, which vary more
+between machines) is reported and the exit status is 1. The committed
+``benchmarks/baseline.json`` was made with the Python and Home Assistant
+versions the CI job pins, as the worst of three runs; regenerate it with
+them after intended changes (``--runs 3 --output benchmarks/baseline.json``).
+"""
+import argparse
+import asyncio
+from contextlib import contextmanager
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import importlib
+import json
+from pathlib import Path
+import platform
+from statistics import median
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+ROOT = Path(__file__).resolve().parent.parent
+COMPONENT = ROOT / "custom_components" / "vrijeme_hr"
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+FEED_FILES = {"croatia": "hrvatska_n.xml", "europe": "europa_n.xml"}
+FEED_ROOTS = {"croatia": "Hrvatska", "europe": "Europa"}
+FORECAST_FILE = "prognoza_3d.xml"
+# What parsing the forecast fixture must give: 5 places with 3 days of
+# 3-hourly forecasts each.
+FORECAST_PLACES = 5
+FORECAST_HOURS = 24
+FORECAST_DAYS = 3
+CITY_COUNTS = (1, 10, 100)
+# Entries reloaded by the history check.
+RELOAD_CITIES = 10
+PARSE_ROUNDS = 50
+# Size of the synthetic document for the peak-memory check of the parse.
+LARGE_FEED_BYTES = 1024 * 1024
+IMPORT_ROUNDS = 5
+# Modules importable without Home Assistant.
+DATA_MODULES = (
+    "table", "parser", "geo", "derived", "history", "interpolate", "metrics", "scheduler",
+    "forecast",
+)
+# Already loaded in any Home Assistant process; imported before timing so
+# only the integration's own cost is measured.
+STDLIB_MODULES = ("asyncio", "logging")
+HA_MODULES = (
+    *STDLIB_MODULES,
+    "aiohttp",
+    "homeassistant.core",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.sensor",
+    "homeassistant.components.weather",
+)
+# Integration entry points, each timed on its own (package __init__ included).
+PLATFORMS = {"setup": "", "sensor": ".sensor", "weather": ".weather", "config_flow": ".config_flow"}
+IMPORT_SCRIPT = """
+import importlib, sys, time, types
+sys.path.insert(0, {root!r})
+package = types.ModuleType("vrijeme_hr_bench")
+package.__path__ = [{component!r}]
+sys.modules["vrijeme_hr_bench"] = package
+for name in {preload!r}:
+    importlib.import_module(name)
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+print(time.perf_counter() - start)
+"""
+# Lower is better for every metric ending in one of these.
+METRIC_SUFFIXES = ("_ms", "_kib", "_bytes", "_writes", "_requests")
+# Absolute change below which a metric never counts as a regression, so
+# near-zero timings and allocator noise do not fail the comparison; the
+# first matching suffix applies. Loop blocking picks up GC pauses and
+# scheduler jitter of several ms from run to run.
+METRIC_SLACK = {"loop_block_ms": 15.0, "_ms": 1.0, "_kib": 32.0}
+
+
+class FixtureServer:
+    """Serve the recorded feeds over HTTP, honouring If-None-Match.
+
+    ``generation`` selects the snapshot: "" serves ``hrvatska_n.xml``,
+    "_next" serves ``hrvatska_n_next.xml`` (the following hour).
+    """
+
+    def __init__(self):
+        """Initialize."""
+        self.generation = ""
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                name = self.path.lstrip("/").removesuffix(".xml")
+                path = FIXTURES / f"{name}{server.generation}.xml"
+                if not path.is_file():
+                    self.send_error(404)
+                    return
+                body = path.read_bytes()
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def url(self, filename: str) -> str:
+        """Return the local URL of a fixture."""
+        return f"http://127.0.0.1:{self._httpd.server_port}/{filename}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def load_data_modules():
+    """Import the HA-independent modules without running the package __init__."""
+    package = types.ModuleType("vrijeme_hr_bench")
+    package.__path__ = [str(COMPONENT)]
+    sys.modules.setdefault("vrijeme_hr_bench", package)
+    return importlib.import_module("vrijeme_hr_bench.parser")
+
+
+def repeat_stations(body: bytes, root: str, size: int) -> bytes:
+    """Return a feed of about ``size`` bytes, repeating the stations of ``body``."""
+    head, _, rest = body.partition(b"<Grad")
+    stations = b"<Grad" + rest.rpartition(f"</{root}>".encode())[0]
+    return head + stations * max(1, size // len(stations)) + f"</{root}>".encode()
+
+
+@contextmanager
+def traced():
+    """Trace allocations; yields a dict that receives the peak in KiB."""
+    result = {}
+    tracemalloc.start()
+    try:
+        yield result
+    finally:
+        result["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+
+def bench_parse() -> dict:
+    """Time and size parse_feed, as the hubs call it, on each recorded feed.
+
+    Besides the recorded feeds, a document of LARGE_FEED_BYTES made by
+    repeating their stations shows how peak memory scales with size: a
+    streaming parse keeps it near the size of the table.
+    """
+    parser_module = load_data_modules()
+    results = {}
+    for feed, filename in FEED_FILES.items():
+        body = (FIXTURES / filename).read_bytes()
+        root = FEED_ROOTS[feed]
+
+        def parse(cities=None, fields=None, body=body):
+            return parser_module.parse_feed(body, root, cities, fields)[0]
+
+        table = parse()
+        one_city = {table.names[0]}
+        timings = {}
+        for label, kwargs in (
+            ("full", {}),
+            ("projected", {"cities": one_city, "fields": {"Temp", "Vlaga", "Tlak"}}),
+        ):
+            samples = []
+            for _ in range(PARSE_ROUNDS):
+                start = time.perf_counter()
+                parse(**kwargs)
+                samples.append(time.perf_counter() - start)
+            timings[f"parse_{label}_ms"] = round(median(samples) * 1000, 3)
+
+        with traced() as memory:
+            parse()
+        large = repeat_stations(body, root, LARGE_FEED_BYTES)
+        with traced() as large_memory:
+            parse(set(), set(), large)
+
+        columns = [*table.numeric.values(), *table.coded.values()]
+        results[feed] = {
+            "stations": len(table),
+            "document_bytes": len(body),
+            **timings,
+            "parse_peak_kib": memory["peak_kib"],
+            "large_parse_peak_kib": large_memory["peak_kib"],
+            "table_column_bytes": sum(c.buffer_info()[1] * c.itemsize for c in columns),
+        }
+    return results
+
+
+def check_forecast(table) -> list[str]:
+    """Return what is wrong with the ForecastTable parsed from the fixture."""
+    problems = []
+    if len(table.hourly) != FORECAST_PLACES:
+        problems.append(f"{len(table.hourly)} places, expected {FORECAST_PLACES}")
+    for name, hourly in table.hourly.items():
+        if len(hourly) != FORECAST_HOURS:
+            problems.append(f"{name}: {len(hourly)} hourly forecasts, expected {FORECAST_HOURS}")
+        if any(f["condition"] is None or f["native_temperature"] is None for f in hourly):
+            problems.append(f"{name}: hourly forecast without condition or temperature")
+        if len(table.daily[name]) != FORECAST_DAYS:
+            problems.append(f"{name}: {len(table.daily[name])} days, expected {FORECAST_DAYS}")
+    if table.unmapped:
+        problems.append(f"unmapped symbols {dict(table.unmapped)}")
+
+    zagreb = table.hourly.get("Zagreb", [{}])
+    expected = {
+        "datetime": "2026-10-18T00:00:00+02:00",
+        "condition": "clear-night",
+        "native_temperature": 4.0,
+        "native_precipitation": 0.0,
+        "wind_bearing": None,
+    }
+    if zagreb[0] != expected:
+        problems.append(f"Zagreb first hour {zagreb[0]}, expected {expected}")
+    first_day = table.daily.get("Zagreb", [{}])[0]
+    if (first_day.get("native_temperature"), first_day.get("native_templow")) != (13.0, 4.0):
+        problems.append(f"Zagreb first day {first_day}, expected a high of 13.0 and low of 4.0")
+    if table.nearest(45.90, 16.85) != "Bjelovar":
+        problems.append("a point in Bjelovar is not given the Bjelovar forecast")
+    if table.nearest(48.21, 16.37) is not None:
+        problems.append("Vienna is given a Croatian forecast")
+    return problems
+
+
+def bench_forecast() -> dict:
+    """Time the forecast parse and check its output against the fixture."""
+    load_data_modules()
+    forecast = importlib.import_module("vrijeme_hr_bench.forecast")
+    body = (FIXTURES / FORECAST_FILE).read_bytes()
+
+    samples = []
+    for _ in range(PARSE_ROUNDS):
+        start = time.perf_counter()
+        forecast.parse_forecast(body)
+        samples.append(time.perf_counter() - start)
+    with traced() as memory:
+        table = forecast.parse_forecast(body)
+
+    return {
+        "places": len(table.hourly),
+        "document_bytes": len(body),
+        "parse_ms": round(median(samples) * 1000, 3),
+        "parse_peak_kib": memory["peak_kib"],
+        "problems": check_forecast(table),
+    }
+
+
+def time_import(modules, preload=()) -> float:
+    """Return the median cold import time of ``modules`` in ms, in fresh interpreters."""
+    script = IMPORT_SCRIPT.format(
+        root=str(ROOT), component=str(COMPONENT), preload=tuple(preload), modules=tuple(modules)
+    )
+    samples = []
+    for _ in range(IMPORT_ROUNDS):
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        samples.append(float(result.stdout))
+    return round(median(samples) * 1000, 2)
+
+
+def bench_import() -> dict:
+    """Time cold imports of the data modules and, with HA, of each entry point."""
+    results = {
+        "data_modules_import_ms": time_import(
+            (f"vrijeme_hr_bench.{name}" for name in DATA_MODULES), STDLIB_MODULES
+        )
+    }
+    try:
+        import homeassistant  # noqa: F401
+    except ImportError:
+        results["platforms"] = {"skipped": "homeassistant is not installed"}
+        return results
+
+    for label, module in PLATFORMS.items():
+        results[f"{label}_import_ms"] = time_import(
+            [f"custom_components.vrijeme_hr{module}"], HA_MODULES
+        )
+    return results
+
+
+def bench_cities(city_count: int) -> list:
+    """Return ``(feed, city)`` of the first ``city_count`` stations in the fixtures."""
+    cities = []
+    for feed, filename in FEED_FILES.items():
+        table, *_ = load_data_modules().parse_feed(
+            (FIXTURES / filename).read_bytes(), FEED_ROOTS[feed], set(), set()
+        )
+        cities.extend((feed, name) for name in table.catalogue)
+    return cities[:city_count]
+
+
+async def async_start_hass(config_dir: str, server, cities: list):
+    """Start a bare Home Assistant with one stored config entry per city.
+
+    The entries are written to ``core.config_entries`` before it loads, as
+    a previous run would have left them, and read the feeds from ``server``.
+    Nothing is set up yet; returns the instance and the entry IDs.
+    """
+    from homeassistant.core import HomeAssistant
+    from homeassistant import bootstrap, config_entries, loader
+
+    from custom_components.vrijeme_hr import const
+
+    entries = [
+        config_entries.ConfigEntry(
+            version=1,
+            minor_version=1,
+            domain=const.DOMAIN,
+            title=city,
+            data={
+                "city": city,
+                const.CONF_COUNTRY: feed,
+                const.CONF_INTEGRATION_TYPE: "sensor",
+                "update_interval": 3600,
+            },
+            options={const.CONF_FEED_SOURCE: server.url(FEED_FILES[feed])},
+            source=config_entries.SOURCE_USER,
+        )
+        for feed, city in cities
+    ]
+    storage = Path(config_dir, ".storage")
+    storage.mkdir()
+    (storage / config_entries.STORAGE_KEY).write_text(
+        json.dumps(
+            {
+                "version": config_entries.STORAGE_VERSION,
+                "minor_version": 1,
+                "key": config_entries.STORAGE_KEY,
+                "data": {"entries": [entry.as_dict() for entry in entries]},
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    hass = HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    return hass, [entry.entry_id for entry in entries]
+
+
+async def _run_polls(server, city_count: int) -> dict:
+    """Set up ``city_count`` config entries and measure setup and two more polls."""
+    from homeassistant.config_entries import ConfigEntryState
+    from homeassistant.const import EVENT_STATE_CHANGED
+
+    from custom_components.vrijeme_hr import const
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass, entry_ids = await async_start_hass(config_dir, server, bench_cities(city_count))
+
+        writes = 0
+
+        def count_write(event):
+            nonlocal writes
+            writes += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+
+        lag = {"max": 0.0}
+
+        async def watch_loop():
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lag["max"] = max(lag["max"], time.perf_counter() - start - 0.005)
+
+        async def setup():
+            # Setting up the integration sets up all of its entries, as at startup.
+            await hass.config_entries.async_setup(entry_ids[0])
+            await hass.async_block_till_done()
+
+        async def hub_poll():
+            hubs = hass.data[const.DOMAIN][const.DATA_HUBS].values()
+            await asyncio.gather(*(hub.async_refresh() for hub in hubs))
+            await hass.async_block_till_done()
+
+        results = {}
+        watcher = asyncio.create_task(watch_loop())
+        for label, generation, poll in (
+            ("setup", "", setup),
+            ("new_data", "_next", hub_poll),
+            ("unchanged", "_next", hub_poll),
+        ):
+            server.generation = generation
+            writes = 0
+            requests = server.requests
+            lag["max"] = 0.0
+            start = time.perf_counter()
+            await poll()
+            results[label] = {
+                "fetch_to_state_ms": round((time.perf_counter() - start) * 1000, 2),
+                "loop_block_ms": round(lag["max"] * 1000, 2),
+                "state_writes": writes,
+                "http_requests": server.requests - requests,
+            }
+        watcher.cancel()
+        results["setup_ms"] = results["setup"].pop("fetch_to_state_ms")
+        failed = [
+            entry.title
+            for entry in hass.config_entries.async_entries(const.DOMAIN)
+            if entry.state is not ConfigEntryState.LOADED
+        ]
+        if failed:
+            raise RuntimeError(f"Entries failed to set up: {', '.join(failed)}")
+
+        server.generation = ""
+        with traced() as memory:
+            await hub_poll()
+        results["poll_peak_kib"] = memory["peak_kib"]
+
+        await hass.async_stop(force=True)
+    return results
+
+
+async def _check_reload(server) -> list[str]:
+    """Reload entries after two polls; return how their rolling statistics changed."""
+    from custom_components.vrijeme_hr import const
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass, entry_ids = await async_start_hass(config_dir, server, bench_cities(RELOAD_CITIES))
+        server.generation = ""
+        await hass.config_entries.async_setup(entry_ids[0])
+        server.generation = "_next"
+        hubs = hass.data[const.DOMAIN][const.DATA_HUBS].values()
+        await asyncio.gather(*(hub.async_refresh() for hub in hubs))
+        await hass.async_block_till_done()
+
+        def statistics():
+            return {
+                state.entity_id: (state.attributes["min_24h"], state.attributes["max_24h"])
+                for state in hass.states.async_all("sensor")
+                if "min_24h" in state.attributes
+            }
+
+        before = statistics()
+        # Unload every entry first, so the hubs are torn down in between.
+        for entry_id in entry_ids:
+            await hass.config_entries.async_unload(entry_id)
+        for entry_id in entry_ids:
+            await hass.config_entries.async_setup(entry_id)
+        await hass.async_block_till_done()
+        after = statistics()
+        await hass.async_stop(force=True)
+
+    problems = [
+        f"{entity_id}: min/max {old} -> {after.get(entity_id)} after reload"
+        for entity_id, old in before.items()
+        if after.get(entity_id) != old
+    ]
+    if not any(low != high for low, high in before.values()):
+        problems.append("no rolling statistics spanning two polls to compare")
+    return problems
+
+
+def bench_reload() -> dict:
+    """Check that the observation history survives reloading the entries."""
+    try:
+        import homeassistant  # noqa: F401
+    except ImportError:
+        return {"skipped": "homeassistant is not installed"}
+
+    sys.path.insert(0, str(ROOT))
+    with FixtureServer() as server:
+        return {"problems": asyncio.run(_check_reload(server))}
+
+
+def bench_polls() -> dict:
+    """Run the poll benchmarks if Home Assistant is available."""
+    try:
+        import homeassistant  # noqa: F401
+    except ImportError:
+        return {"skipped": "homeassistant is not installed"}
+
+    sys.path.insert(0, str(ROOT))
+    results = {}
+    with FixtureServer() as server:
+        for city_count in CITY_COUNTS:
+            results[str(city_count)] = asyncio.run(_run_polls(server, city_count))
+    return results
+
+
+def homeassistant_version():
+    """Return the installed Home Assistant version, or None."""
+    try:
+        from homeassistant.const import __version__
+    except ImportError:
+        return None
+    return __version__
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Flatten nested results into dotted metric names."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def worst_of(runs: list) -> dict:
+    """Merge the results of several runs, keeping the worst value of each metric."""
+    merged = {}
+    for key, value in runs[0].items():
+        values = [run.get(key) for run in runs]
+        if isinstance(value, dict):
+            merged[key] = worst_of(values)
+        elif key.endswith(METRIC_SUFFIXES) and all(isinstance(v, (int, float)) for v in values):
+            merged[key] = max(values)
+        else:
+            merged[key] = value
+    return merged
+
+
+def find_regressions(
+    current: dict, baseline: dict, threshold: float, time_threshold: float
+) -> list[str]:
+    """Return the metrics that got worse than the baseline by more than their threshold."""
+    current = flatten(current)
+    regressions = []
+    for name, old in flatten(baseline).items():
+        new = current.get(name)
+        suffix = next((s for s in METRIC_SUFFIXES if name.endswith(s)), None)
+        if new is None or suffix is None:
+            continue
+        allowed = time_threshold if suffix == "_ms" else threshold
+        slack = next((v for s, v in METRIC_SLACK.items() if name.endswith(s)), 0.01)
+        if new > old * (1 + allowed) and new - old > slack:
+            regressions.append(f"{name}: {old} -> {new}")
+    return regressions
+
+
+def main() -> int:
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed relative growth (default 0.25)"
+    )
+    parser.add_argument(
+        "--time-threshold",
+        type=float,
+        default=1.0,
+        help="allowed relative slowdown of timings (default 1.0)",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=1, help="run N times and keep the worst of each metric"
+    )
+    args = parser.parse_args()
+
+    runs = [
+        {
+            "import": bench_import(),
+            "parse": bench_parse(),
+            "forecast": bench_forecast(),
+            "poll": bench_polls(),
+            "reload": bench_reload(),
+        }
+        for _ in range(max(1, args.runs))
+    ]
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "homeassistant": homeassistant_version(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "runs": len(runs),
+        },
+        **worst_of(runs),
+    }
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+    problems = []
+    for name in ("forecast", "reload"):
+        for problem in results[name].get("problems", []):
+            problems.append(problem)
+            print(f"{name.upper()} {problem}", file=sys.stderr)
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = find_regressions(results, baseline, args.threshold, args.time_threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions or problems else 0
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
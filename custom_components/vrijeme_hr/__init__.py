@@ -1,29 +1,146 @@
 """The Vrijeme HR integration."""
+import logging
+
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
-from .const import DOMAIN, CONF_INTEGRATION_TYPE, DEFAULT_UPDATE_INTERVAL
-from .coordinator import VrijemeHrvatskaDataUpdateCoordinator
+from .const import (
+    DOMAIN,
+    CONF_ALL_STATIONS,
+    CONF_AUTO_STATION,
+    CONF_COUNTRY,
+    CONF_FEED_SOURCE,
+    CONF_INTEGRATION_TYPE,
+    CONF_PARSE_IN_PROCESS,
+    CONF_SENSOR_OPTIONS,
+    CONF_SCHEDULE_MODE,
+    CONF_STATISTICS,
+    CONF_NEIGHBOURS,
+    CONF_VIRTUAL,
+    DEFAULT_COUNTRY,
+    DEFAULT_SCHEDULE_MODE,
+    DEFAULT_NEIGHBOURS,
+    DEFAULT_UPDATE_INTERVAL,
+    WEATHER_ENTITY_KEYS,
+    get_feed_keys,
+    get_station_id,
+)
+from .catalogue import async_get_station_index
+from .coordinator import (
+    VrijemeHrvatskaAllStationsCoordinator,
+    VrijemeHrvatskaDataUpdateCoordinator,
+    VrijemeHrvatskaVirtualCoordinator,
+    async_get_hub,
+)
+from .interpolate import idw_weights
+
+_LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Vrijeme HR from a config entry."""
     config = {**entry.data, **entry.options}
     integration_type = config.get(CONF_INTEGRATION_TYPE, "sensor")
+    country = entry.data.get(CONF_COUNTRY, DEFAULT_COUNTRY)
     update_interval = int(
         config.get("update_interval", entry.data.get("update_interval", DEFAULT_UPDATE_INTERVAL))
     )
 
-    coordinator = VrijemeHrvatskaDataUpdateCoordinator(
-        hass=hass,
-        city=entry.data["city"],
-        update_interval=update_interval
-    )
+    # Data keys the entities of this entry read, so the feed parser can
+    # skip every other field.
+    keys = set()
+    if integration_type == "sensor":
+        keys.update(get_feed_keys(country))
+    elif integration_type == "both":
+        keys.update(entry.data.get(CONF_SENSOR_OPTIONS, []))
+    if integration_type in ["weather", "both"]:
+        keys.update(WEATHER_ENTITY_KEYS)
+
+    hub = async_get_hub(hass, country, config.get(CONF_FEED_SOURCE) or None)
+    await hub.async_restore()
+
+    city = entry.data["city"]
+    schedule_mode = config.get(CONF_SCHEDULE_MODE, DEFAULT_SCHEDULE_MODE)
+    parse_in_process = bool(config.get(CONF_PARSE_IN_PROCESS))
+    if entry.data.get(CONF_ALL_STATIONS):
+        # Stations and fields are narrowed down once the sensor platform
+        # knows which entities are enabled.
+        coordinator = VrijemeHrvatskaAllStationsCoordinator(
+            hass,
+            hub,
+            city,
+            update_interval=update_interval,
+            keys=keys,
+            schedule_mode=schedule_mode,
+            parse_in_process=parse_in_process,
+        )
+    elif entry.data.get(CONF_VIRTUAL):
+        point = (entry.data[CONF_LATITUDE], entry.data[CONF_LONGITUDE])
+        neighbours = entry.data.get(CONF_NEIGHBOURS, DEFAULT_NEIGHBOURS)
+        index = await async_get_station_index(hass, country)
+        stations = [
+            name for name, _ in (idw_weights(index, *point, neighbours) if index is not None else ())
+        ]
+        coordinator = VrijemeHrvatskaVirtualCoordinator(
+            hass,
+            hub,
+            city,
+            point,
+            neighbours,
+            stations,
+            update_interval=update_interval,
+            keys=keys,
+            schedule_mode=schedule_mode,
+            parse_in_process=parse_in_process,
+        )
+    else:
+        location = None
+        if entry.data.get(CONF_AUTO_STATION):
+            # Re-pick the nearest station, the feed may have changed since.
+            location = (entry.data[CONF_LATITUDE], entry.data[CONF_LONGITUDE])
+            index = await async_get_station_index(hass, country)
+            nearest = index.nearest(*location) if index is not None else []
+            if nearest:
+                city = nearest[0][0]
+
+        coordinator = VrijemeHrvatskaDataUpdateCoordinator(
+            hass=hass,
+            hub=hub,
+            city=city,
+            update_interval=update_interval,
+            keys=keys,
+            schedule_mode=schedule_mode,
+            parse_in_process=parse_in_process,
+            location=location,
+        )
+    entry.async_on_unload(hub.async_subscribe(coordinator))
+
+    if config.get(CONF_STATISTICS):
+        if "recorder" in hass.config.components:
+            # Imported here so entries without the option never load the recorder models.
+            from .statistics import StatisticsWriter
+
+            writer = StatisticsWriter(
+                hass,
+                coordinator,
+                get_station_id(entry.data),
+                per_station=bool(entry.data.get(CONF_ALL_STATIONS)),
+            )
+            entry.async_on_unload(coordinator.async_add_listener(writer.async_handle_update))
+        else:
+            _LOGGER.warning("Statistics import for %s needs the recorder, which is not loaded", city)
 
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as err:
-        raise ConfigEntryNotReady(f"Initial update failed: {err}") from err
+    if coordinator.async_restore():
+        # Entities start from the persisted snapshot; go live in the background.
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_refresh_{entry.data['city']}"
+        )
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception as err:
+            raise ConfigEntryNotReady(f"Initial update failed: {err}") from err
 
     platforms = []
     if integration_type in ["sensor", "both"]:
@@ -0,0 +1,82 @@
+"""Cached catalogue and spatial index of the stations available in a feed."""
+from datetime import timedelta
+import logging
+
+from aiohttp import hdrs
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_CATALOGUE, DATA_HUBS, DEFAULT_COUNTRY, DOMAIN, FEEDS
+from .coordinator import snapshot_store
+from .geo import StationIndex
+from .parser import parse_feed
+from .source import ACCEPT_ENCODING, async_get_fetch_semaphore, async_read_body
+from .table import StationTable
+
+_LOGGER = logging.getLogger(__name__)
+
+CATALOGUE_TTL = timedelta(hours=6)
+
+
+async def async_get_station_index(hass: HomeAssistant, feed: str = DEFAULT_COUNTRY):
+    """Return the StationIndex of a feed, or None if it cannot be had.
+
+    Served from memory while fresh, otherwise seeded from a running hub's
+    last parse or the saved snapshot, and only downloaded when neither is
+    recent enough. A failed download falls back to whatever was seeded.
+    """
+    cache = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_CATALOGUE, {})
+    now = dt_util.utcnow()
+
+    cached = cache.get(feed)
+    if cached is None or now - cached[0] > CATALOGUE_TTL:
+        cached = await _async_seed(hass, feed) or cached
+    if cached is None or now - cached[0] > CATALOGUE_TTL:
+        try:
+            cached = (now, await _async_fetch_index(hass, feed))
+        except Exception as err:
+            _LOGGER.error("Error fetching cities: %s", err)
+            if cached is None:
+                return None
+
+    cache[feed] = cached
+    return cached[1]
+
+
+async def _async_seed(hass: HomeAssistant, feed: str):
+    """Return (fetched_at, index) from a running hub or the saved snapshot."""
+    hub = hass.data[DOMAIN].get(DATA_HUBS, {}).get(feed)
+    if hub is not None and hub.data is not None:
+        return hub.fetched_at, hub.station_index
+
+    try:
+        snapshot = await snapshot_store(hass, feed).async_load()
+        if not snapshot:
+            return None
+        table = StationTable.from_dict(snapshot["table"])
+        return dt_util.parse_datetime(snapshot["fetched_at"]), StationIndex.from_table(table)
+    except Exception as err:
+        _LOGGER.debug("Ignoring unreadable snapshot of %s: %s", feed, err)
+        return None
+
+
+async def _async_fetch_index(hass: HomeAssistant, feed: str) -> StationIndex:
+    """Download the feed over the shared session, keeping station names and places."""
+    url = FEEDS[feed]["url"]
+    session = async_get_clientsession(hass)
+    headers = {hdrs.ACCEPT_ENCODING: ACCEPT_ENCODING}
+    async with async_get_fetch_semaphore(hass), session.get(
+        url, headers=headers, timeout=20, auto_decompress=False
+    ) as response:
+        if response.status != 200:
+            raise ValueError(f"HTTP {response.status}")
+        body, _ = await async_read_body(response)
+
+    table, *_ = await hass.async_add_executor_job(
+        parse_feed, body, FEEDS[feed]["root"], set(), set()
+    )
+    index = StationIndex.from_table(table)
+
+    _LOGGER.debug("Found %d cities in %s", len(index.names), url)
+    return index
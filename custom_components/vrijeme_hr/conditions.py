@@ -0,0 +1,194 @@
+"""Classification of DHMZ weather descriptions into HA conditions."""
+from collections import Counter
+from datetime import datetime, timezone
+import math
+import re
+import unicodedata
+
+from .const import WEATHER_MAPPING
+
+# Clauses of a description are separated by punctuation or the
+# conjunctions "i" (and), "s"/"sa"/"uz" (with).
+_CLAUSE_RE = re.compile(r"\s*(?:[,;/]|\b(?:i|s|sa|uz)\b)\s*")
+
+# Word stems recognised inside a clause, checked in order.
+CLAUSE_STEMS = (
+    (("grmljavin", "munj", "oluj"), "lightning"),
+    (("tuc",), "hail"),
+    (("susnjezic", "susnijeg"), "snowy-rainy"),
+    (("pljus",), "pouring"),
+    (("kis", "rosulj"), "rainy"),
+    (("snijeg", "snjez", "snijez"), "snowy"),
+    (("magl", "sumaglic"), "fog"),
+    (("vjet", "povjetar", "lahor", "bura", "burin", "jugo"), "windy"),
+    (("oblacn",), "cloudy"),
+    (("vedr", "suncan"), "sunny"),
+)
+# Words turning rain into a downpour and clouds into partial cover.
+HEAVY_WORDS = frozenset({"jak", "jaka", "jako", "obilna", "obilan"})
+PARTIAL_WORDS = frozenset({"umjereno", "djelomicno", "promjenljivo", "malo"})
+
+# Combined conditions, strongest first.
+PRIORITY = (
+    "lightning-rainy",
+    "lightning",
+    "hail",
+    "snowy-rainy",
+    "snowy",
+    "pouring",
+    "rainy",
+    "fog",
+    "windy-variant",
+    "windy",
+    "cloudy",
+    "partlycloudy",
+    "sunny",
+)
+
+# Sun elevation below which it counts as night, in degrees (sunset).
+SUNSET_ELEVATION = -0.833
+MEMO_SIZE = 256
+
+
+def normalize(phrase: str) -> str:
+    """Lowercase, strip diacritics and collapse whitespace."""
+    text = phrase.casefold().replace("đ", "d")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.split())
+
+
+# Known whole phrases and clauses, keyed by their normalized form.
+PHRASES = {normalize(phrase): condition for phrase, condition in WEATHER_MAPPING.items()}
+
+
+def sun_elevation(latitude: float, longitude: float, when: datetime) -> float:
+    """Return the sun's elevation in degrees (NOAA approximation)."""
+    when = when.astimezone(timezone.utc)
+    hours = when.hour + when.minute / 60 + when.second / 3600
+    gamma = 2 * math.pi / 365 * (when.timetuple().tm_yday - 1 + (hours - 12) / 24)
+    equation_of_time = 229.18 * (
+        0.000075
+        + 0.001868 * math.cos(gamma)
+        - 0.032077 * math.sin(gamma)
+        - 0.014615 * math.cos(2 * gamma)
+        - 0.040849 * math.sin(2 * gamma)
+    )
+    declination = (
+        0.006918
+        - 0.399912 * math.cos(gamma)
+        + 0.070257 * math.sin(gamma)
+        - 0.006758 * math.cos(2 * gamma)
+        + 0.000907 * math.sin(2 * gamma)
+        - 0.002697 * math.cos(3 * gamma)
+        + 0.00148 * math.sin(3 * gamma)
+    )
+    solar_minutes = hours * 60 + equation_of_time + 4 * longitude
+    hour_angle = math.radians(solar_minutes / 4 - 180)
+    lat = math.radians(latitude)
+    cos_zenith = math.sin(lat) * math.sin(declination) + math.cos(lat) * math.cos(
+        declination
+    ) * math.cos(hour_angle)
+    return 90 - math.degrees(math.acos(max(-1.0, min(1.0, cos_zenith))))
+
+
+def _classify_clause(clause: str):
+    """Return the condition of a single normalized clause, or None."""
+    if clause in PHRASES:
+        return PHRASES[clause]
+    words = clause.split()
+    for stems, condition in CLAUSE_STEMS:
+        if any(word.startswith(stems) for word in words):
+            if condition == "rainy" and HEAVY_WORDS.intersection(words):
+                return "pouring"
+            if condition == "cloudy" and PARTIAL_WORDS.intersection(words):
+                return "partlycloudy"
+            return condition
+    return None
+
+
+def _combine(conditions: set):
+    """Reduce the conditions of all clauses to one."""
+    if "lightning" in conditions and conditions & {"rainy", "pouring"}:
+        return "lightning-rainy"
+    if "snowy" in conditions and conditions & {"rainy", "pouring"}:
+        return "snowy-rainy"
+    if "windy" in conditions and conditions & {"cloudy", "partlycloudy"}:
+        return "windy-variant"
+    for condition in PRIORITY:
+        if condition in conditions:
+            return condition
+    return None
+
+
+class ConditionClassifier:
+    """Map raw descriptions to HA conditions, remembering every phrase seen.
+
+    Each distinct phrase is classified once; ``unmapped`` counts, per
+    observation, the clauses nothing matched, so the phrase table can be
+    grown from what the feeds actually publish.
+    """
+
+    def __init__(self):
+        """Initialize."""
+        self._memo = {}
+        self.unmapped = Counter()
+
+    def classify(self, phrase):
+        """Return ``(condition, unknown clauses)`` of a raw description.
+
+        "sunny" stands for a clear sky by day and night alike; see
+        ``condition`` for the daylight-aware result.
+        """
+        result = self._memo.get(phrase)
+        if result is None:
+            normalized = normalize(phrase or "")
+            conditions = set()
+            unknown = []
+            if normalized in PHRASES:
+                conditions.add(PHRASES[normalized])
+            elif normalized:
+                for clause in filter(None, _CLAUSE_RE.split(normalized)):
+                    condition = _classify_clause(clause)
+                    if condition is None:
+                        unknown.append(clause)
+                    else:
+                        conditions.add(condition)
+            condition = _combine(conditions)
+            if condition is None and normalized:
+                condition = "exceptional"
+            result = (condition, tuple(unknown))
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[phrase] = result
+        return result
+
+    def condition(self, phrase, latitude=None, longitude=None, when=None):
+        """Return the HA condition of a description at a place and time."""
+        condition, unknown = self.classify(phrase)
+        self.unmapped.update(unknown)
+        if (
+            condition == "sunny"
+            and latitude is not None
+            and longitude is not None
+            and when is not None
+            and sun_elevation(latitude, longitude, when) < SUNSET_ELEVATION
+        ):
+            return "clear-night"
+        return condition
+
+    def classify_table(self, table, when, latitude=None, longitude=None) -> list:
+        """Return the condition of every row of a StationTable.
+
+        Stations without coordinates use ``latitude``/``longitude``.
+        """
+        codes = table.coded["Vrijeme"]
+        lats = table.numeric["Lat"]
+        lons = table.numeric["Lon"]
+        conditions = []
+        for row, code in enumerate(codes):
+            lat, lon = lats[row], lons[row]
+            if math.isnan(lat) or math.isnan(lon):
+                lat, lon = latitude, longitude
+            conditions.append(self.condition(table.vocabulary[code], lat, lon, when))
+        return conditions
@@ -1,47 +1,58 @@
 """Config flow for Vrijeme HR integration."""
 from typing import Any, Dict, Optional
 import voluptuous as vol
-import aiohttp
-import xmltodict
 import logging
 import os
 from homeassistant import config_entries
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE, CONF_NAME
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 
+from .catalogue import async_get_station_index
+from .source import is_url
 from .const import (
+    ALL_STATIONS,
+    CONF_ALL_STATIONS,
     DOMAIN,
+    CONF_AUTO_STATION,
     CONF_CITY,
+    CONF_COUNTRY,
+    CONF_FEED_SOURCE,
+    CONF_PARSE_IN_PROCESS,
     CONF_UPDATE_INTERVAL,
     CONF_INTEGRATION_TYPE,
     CONF_SENSOR_OPTIONS,
+    CONF_SCHEDULE_MODE,
+    CONF_STATISTICS,
+    CONF_NEIGHBOURS,
+    CONF_VIRTUAL,
+    DEFAULT_COUNTRY,
+    DEFAULT_SCHEDULE_MODE,
+    DEFAULT_NEIGHBOURS,
     DEFAULT_UPDATE_INTERVAL,
-    CROATIA_URL,
+    NEAREST_STATION,
+    SCHEDULE_ADAPTIVE,
+    SCHEDULE_FIXED,
+    SUPPORTED_COUNTRIES,
+    VIRTUAL_STATION,
+    get_feed_keys,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
-async def get_available_cities() -> list[str]:
-    """Get list of available cities from the XML."""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(CROATIA_URL, timeout=20) as response:
-                if response.status != 200:
-                    _LOGGER.error("Failed to fetch data from %s: %s", CROATIA_URL, response.status)
-                    return []
-                xml_data = await response.text()
-                data = xmltodict.parse(xml_data)
-                
-                cities = []
-                for grad in data["Hrvatska"]["Grad"]:
-                    cities.append(grad["GradIme"])
-                
-                _LOGGER.debug("Found %d cities for Croatia", len(cities))
-                return sorted(cities)
-    except Exception as err:
-        _LOGGER.error("Error fetching cities: %s", err)
-        return []
+
+def get_schedule_options(is_croatian: bool) -> dict[str, str]:
+    """Return the polling mode labels for the detected language."""
+    if is_croatian:
+        return {
+            SCHEDULE_FIXED: "Fiksni interval",
+            SCHEDULE_ADAPTIVE: "Prilagodljivo (nakon objave podataka)",
+        }
+    return {
+        SCHEDULE_FIXED: "Fixed interval",
+        SCHEDULE_ADAPTIVE: "Adaptive (shortly after data is published)",
+    }
 
 class VrijemeHrvatskaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Vrijeme HR."""
@@ -51,7 +62,10 @@ class VrijemeHrvatskaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self):
         """Initialize flow."""
         self._cities: list[str] = []
+        self._index = None
+        self._city_input: Optional[Dict[str, Any]] = None
         self._integration_type: Optional[str] = None
+        self._country: str = DEFAULT_COUNTRY
         self._city: Optional[str] = None
         self._update_interval: Optional[int] = None
         self._is_croatian = None  # Will be determined at runtime
@@ -90,15 +104,18 @@ class VrijemeHrvatskaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             self._integration_type = user_input[CONF_INTEGRATION_TYPE]
+            self._country = user_input.get(CONF_COUNTRY, DEFAULT_COUNTRY)
             
-            self._cities = await get_available_cities()
+            self._index = await async_get_station_index(self.hass, self._country)
+            self._cities = sorted(self._index.names) if self._index is not None else []
             
             if not self._cities:
                 errors["base"] = "no_cities"
                 return self.async_show_form(
                     step_id="user",
                     data_schema=vol.Schema({
-                        vol.Required(CONF_INTEGRATION_TYPE): vol.In(integration_options)
+                        vol.Required(CONF_INTEGRATION_TYPE): vol.In(integration_options),
+                        vol.Optional(CONF_COUNTRY, default=DEFAULT_COUNTRY): vol.In(SUPPORTED_COUNTRIES),
                     }),
                     errors=errors
                 )
@@ -108,7 +125,8 @@ class VrijemeHrvatskaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema({
-                vol.Required(CONF_INTEGRATION_TYPE): vol.In(integration_options)
+                vol.Required(CONF_INTEGRATION_TYPE): vol.In(integration_options),
+                vol.Optional(CONF_COUNTRY, default=DEFAULT_COUNTRY): vol.In(SUPPORTED_COUNTRIES),
             }),
             errors=errors
         )
@@ -128,7 +146,11 @@ class VrijemeHrvatskaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 "wind_direction": "Smjer vjetra",
                 "condition": "Vremenske prilike",
                 "latitude": "Geografska širina",
-                "longitude": "Geografska dužina"
+                "longitude": "Geografska dužina",
+                "dew_point": "Rosište",
+                "apparent_temperature": "Prividna temperatura",
+                "wind_chill": "Hlađenje vjetrom",
+                "heat_index": "Toplinski indeks",
             }
             update_interval_description = "Učestalost ažuriranja u sekundama (zadano: 3600)"
         else:
@@ -141,24 +163,39 @@ class VrijemeHrvatskaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 "wind_direction": "Wind Direction",
                 "condition": "Weather Condition",
                 "latitude": "Latitude",
-                "longitude": "Longitude"
+                "longitude": "Longitude",
+                "dew_point": "Dew Point",
+                "apparent_temperature": "Apparent Temperature",
+                "wind_chill": "Wind Chill",
+                "heat_index": "Heat Index",
             }
             update_interval_description = "Update interval in seconds (default: 3600)"
 
+        home = (self.hass.config.latitude, self.hass.config.longitude)
+        nearest = self._index.nearest(*home) if self._index is not None else []
+
         if user_input is not None:
             selected_city = user_input[CONF_CITY]
-            await self.async_set_unique_id(selected_city.lower())
+            if selected_city == VIRTUAL_STATION:
+                self._city_input = user_input
+                return await self.async_step_virtual()
+            if selected_city == ALL_STATIONS:
+                return await self._async_create_all_stations(user_input)
+            auto_station = selected_city == NEAREST_STATION and bool(nearest)
+            if auto_station:
+                selected_city = nearest[0][0]
+                await self.async_set_unique_id(f"{self._country}_{NEAREST_STATION}")
+            # Croatian cities keep their original unique id.
+            elif self._country == DEFAULT_COUNTRY:
+                await self.async_set_unique_id(selected_city.lower())
+            else:
+                await self.async_set_unique_id(f"{self._country}_{selected_city}".lower())
             self._abort_if_unique_id_configured()
 
-            data = {
-                CONF_CITY: selected_city,
-                CONF_INTEGRATION_TYPE: self._integration_type,
-                CONF_UPDATE_INTERVAL: user_input.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
-            }
-            
-            # If integration type is "both", include sensor options
-            if self._integration_type == "both":
-                data[CONF_SENSOR_OPTIONS] = user_input.get(CONF_SENSOR_OPTIONS, [])
+            data = self._entry_data(user_input, selected_city)
+            if auto_station:
+                data[CONF_AUTO_STATION] = True
+                data[CONF_LATITUDE], data[CONF_LONGITUDE] = home
 
             return self.async_create_entry(
                 title=f"Vrijeme HR {selected_city}",
@@ -166,17 +203,46 @@ class VrijemeHrvatskaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
 
         # Build schema based on integration type
+        city_options = {city: city for city in self._cities}
+        if nearest:
+            nearest_label = (
+                "Najbliža postaja (automatski)" if self._is_croatian else "Nearest station (automatic)"
+            )
+            virtual_label = (
+                "Virtualna postaja (interpolirano)"
+                if self._is_croatian
+                else "Virtual station (interpolated)"
+            )
+            city_options = {
+                NEAREST_STATION: f"{nearest_label}: {nearest[0][0]}, {nearest[0][1]:.0f} km",
+                VIRTUAL_STATION: virtual_label,
+                **city_options,
+            }
+        if self._integration_type == "sensor":
+            all_label = (
+                "Sve postaje (senzori se uključuju pojedinačno)"
+                if self._is_croatian
+                else "All stations (enable sensors individually)"
+            )
+            city_options = {ALL_STATIONS: all_label, **city_options}
         schema = {
-            vol.Required(CONF_CITY): vol.In(self._cities),
+            vol.Required(
+                CONF_CITY, default=nearest[0][0] if nearest else vol.UNDEFINED
+            ): vol.In(city_options),
             vol.Optional(
                 CONF_UPDATE_INTERVAL, 
                 default=DEFAULT_UPDATE_INTERVAL, 
                 description=update_interval_description
             ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+            vol.Optional(
+                CONF_SCHEDULE_MODE, default=DEFAULT_SCHEDULE_MODE
+            ): vol.In(get_schedule_options(self._is_croatian)),
         }
         
         # Add sensor selection if integration type is "both"
         if self._integration_type == "both":
+            feed_keys = get_feed_keys(self._country)
+            sensor_labels = {k: v for k, v in sensor_labels.items() if k in feed_keys}
             schema[vol.Required(CONF_SENSOR_OPTIONS)] = cv.multi_select(sensor_labels)
 
         return self.async_show_form(
@@ -184,6 +250,62 @@ class VrijemeHrvatskaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=vol.Schema(schema)
         )
 
+    async def async_step_virtual(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
+        """Handle the location of a virtual station."""
+        if user_input is not None:
+            latitude = user_input[CONF_LATITUDE]
+            longitude = user_input[CONF_LONGITUDE]
+            await self.async_set_unique_id(
+                f"{self._country}_{VIRTUAL_STATION}_{latitude:.4f}_{longitude:.4f}"
+            )
+            self._abort_if_unique_id_configured()
+
+            data = self._entry_data(self._city_input, user_input[CONF_NAME])
+            data[CONF_VIRTUAL] = True
+            data[CONF_LATITUDE] = latitude
+            data[CONF_LONGITUDE] = longitude
+            data[CONF_NEIGHBOURS] = user_input[CONF_NEIGHBOURS]
+            return self.async_create_entry(
+                title=f"Vrijeme HR {user_input[CONF_NAME]}",
+                data=data
+            )
+
+        return self.async_show_form(
+            step_id="virtual",
+            data_schema=vol.Schema({
+                vol.Required(CONF_NAME): str,
+                vol.Required(CONF_LATITUDE, default=self.hass.config.latitude): cv.latitude,
+                vol.Required(CONF_LONGITUDE, default=self.hass.config.longitude): cv.longitude,
+                vol.Required(CONF_NEIGHBOURS, default=DEFAULT_NEIGHBOURS): vol.All(
+                    vol.Coerce(int), vol.Range(min=2, max=8)
+                ),
+            })
+        )
+
+    async def _async_create_all_stations(self, user_input: Dict[str, Any]) -> FlowResult:
+        """Create an entry serving every station of the feed."""
+        await self.async_set_unique_id(f"{self._country}_{ALL_STATIONS}")
+        self._abort_if_unique_id_configured()
+
+        name = f"{SUPPORTED_COUNTRIES[self._country].split(' (')[0]} all stations"
+        data = self._entry_data(user_input, name)
+        data[CONF_ALL_STATIONS] = True
+        return self.async_create_entry(title=f"Vrijeme HR {name}", data=data)
+
+    def _entry_data(self, user_input: Dict[str, Any], city: str) -> Dict[str, Any]:
+        """Return the entry data shared by all station kinds."""
+        data = {
+            CONF_CITY: city,
+            CONF_COUNTRY: self._country,
+            CONF_INTEGRATION_TYPE: self._integration_type,
+            CONF_UPDATE_INTERVAL: user_input.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL),
+            CONF_SCHEDULE_MODE: user_input.get(CONF_SCHEDULE_MODE, DEFAULT_SCHEDULE_MODE),
+        }
+        # If integration type is "both", include sensor options
+        if self._integration_type == "both":
+            data[CONF_SENSOR_OPTIONS] = user_input.get(CONF_SENSOR_OPTIONS, [])
+        return data
+
 class VrijemeHrvatskaOptionsFlow(config_entries.OptionsFlow):
     """Handle Vrijeme HR options."""
 
@@ -204,13 +326,29 @@ class VrijemeHrvatskaOptionsFlow(config_entries.OptionsFlow):
             else "Update interval in seconds"
         )
 
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            source = user_input.get(CONF_FEED_SOURCE, "").strip()
+            if source and not is_url(source) and not await self.hass.async_add_executor_job(
+                os.path.exists, source
+            ):
+                errors[CONF_FEED_SOURCE] = "invalid_source"
+            else:
+                user_input.pop(CONF_FEED_SOURCE, None)
+                if source:
+                    user_input[CONF_FEED_SOURCE] = source
+                return self.async_create_entry(title="", data=user_input)
 
         current_update_interval = self.config_entry.options.get(
             CONF_UPDATE_INTERVAL,
             self.config_entry.data.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL),
         )
+        current_schedule_mode = self.config_entry.options.get(
+            CONF_SCHEDULE_MODE,
+            self.config_entry.data.get(CONF_SCHEDULE_MODE, DEFAULT_SCHEDULE_MODE),
+        )
+        current_statistics = self.config_entry.options.get(CONF_STATISTICS, False)
+        current_parse_in_process = self.config_entry.options.get(CONF_PARSE_IN_PROCESS, False)
 
         return self.async_show_form(
             step_id="init",
@@ -220,5 +358,24 @@ class VrijemeHrvatskaOptionsFlow(config_entries.OptionsFlow):
                     default=current_update_interval,
                     description=update_interval_description,
                 ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
-            })
+                vol.Optional(
+                    CONF_SCHEDULE_MODE,
+                    default=current_schedule_mode,
+                ): vol.In(get_schedule_options(is_croatian)),
+                vol.Optional(
+                    CONF_STATISTICS,
+                    default=current_statistics,
+                ): bool,
+                vol.Optional(
+                    CONF_PARSE_IN_PROCESS,
+                    default=current_parse_in_process,
+                ): bool,
+                vol.Optional(
+                    CONF_FEED_SOURCE,
+                    description={
+                        "suggested_value": self.config_entry.options.get(CONF_FEED_SOURCE)
+                    },
+                ): str,
+            }),
+            errors=errors,
         )
@@ -1,4 +1,6 @@
 """Constants for the Vrijeme HR integration."""
+from types import MappingProxyType
+
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorStateClass,
@@ -8,22 +10,89 @@ from homeassistant.const import (
     PERCENTAGE,
     UnitOfPressure,
     UnitOfSpeed,
+    UnitOfInformation,
+    UnitOfTime,
 )
 
+# Defined with the interpolation code, which must not need Home Assistant.
+from .interpolate import DEFAULT_NEIGHBOURS  # noqa: F401
+
 DOMAIN = "vrijeme_hr"
 CONF_CITY = "city"
 CONF_COUNTRY = "country"
 CONF_UPDATE_INTERVAL = "update_interval"
 CONF_INTEGRATION_TYPE = "integration_type"
 CONF_WEATHER_SENSORS = "weather_sensors"  # instead of sensor_options
+CONF_SCHEDULE_MODE = "schedule_mode"
+# Option overriding where the feed is read from: an HTTP(S) URL, a file, or
+# a directory of recorded documents replayed one per poll. Empty reads DHMZ.
+CONF_FEED_SOURCE = "feed_source"
+# Option parsing the entry's feed in a worker process rather than a thread.
+# The worker is spawned on first use and lives as long as the feed's hub.
+CONF_PARSE_IN_PROCESS = "parse_in_process"
+# Entries created with "nearest station" follow the station nearest to the
+# home location stored with them, even if their city leaves the feed.
+CONF_AUTO_STATION = "auto_station"
+NEAREST_STATION = "nearest"
+# Virtual station entries interpolate the weather at their own coordinates
+# from the CONF_NEIGHBOURS nearest stations.
+CONF_VIRTUAL = "virtual"
+CONF_NEIGHBOURS = "neighbours"
+VIRTUAL_STATION = "virtual"
+# An all-stations entry serves every station of its feed from one
+# coordinator; its sensors are registered disabled and only the ones a user
+# enables are created.
+CONF_ALL_STATIONS = "all_stations"
+ALL_STATIONS = "all"
+# Option importing hourly observations into long-term statistics as
+# external statistics, instead of having sensors record them as states.
+CONF_STATISTICS = "statistics"
 
 DEFAULT_UPDATE_INTERVAL = 3600
 
+# "fixed" polls every update_interval; "adaptive" polls shortly after each
+# expected feed publication, with update_interval as the longest gap.
+SCHEDULE_FIXED = "fixed"
+SCHEDULE_ADAPTIVE = "adaptive"
+SCHEDULE_MODES = (SCHEDULE_FIXED, SCHEDULE_ADAPTIVE)
+DEFAULT_SCHEDULE_MODE = SCHEDULE_FIXED
+
+# hass.data[DOMAIN] key holding the shared feed hubs, keyed by feed
+DATA_HUBS = "hubs"
+# hass.data[DOMAIN] key holding the feed snapshot stores, keyed by storage key
+DATA_STORES = "stores"
+# hass.data[DOMAIN] key caching station catalogues, keyed by feed
+DATA_CATALOGUE = "catalogue"
+# hass.data[DOMAIN] key of the semaphore bounding concurrent feed downloads
+DATA_FETCH_SEMAPHORE = "fetch_semaphore"
+MAX_CONCURRENT_FETCHES = 2
+# hass.data[DOMAIN] key holding the shared forecast hub
+DATA_FORECAST = "forecast"
+
 CROATIA_URL = "https://vrijeme.hr/hrvatska_n.xml"
 EUROPE_URL = "https://vrijeme.hr/europa_n.xml"
+# Hourly 3-day forecast of Croatian places, parsed by forecast.py
+FORECAST_URL = "https://prognoza.hr/tri/3d_graf_i_simboli.xml"
 
 SUPPORTED_COUNTRIES = {
-    "croatia": "Croatia (Hrvatska)"
+    "croatia": "Croatia (Hrvatska)",
+    "europe": "Europe (Europa)",
+}
+DEFAULT_COUNTRY = "croatia"
+
+# Feed registry, keyed like SUPPORTED_COUNTRIES: where each feed lives, its
+# root element and the <Podatci> fields its stations carry.
+FEEDS = {
+    "croatia": {
+        "url": CROATIA_URL,
+        "root": "Hrvatska",
+        "fields": ("Temp", "Vlaga", "Tlak", "TlakTend", "VjetarSmjer", "VjetarBrzina", "Vrijeme"),
+    },
+    "europe": {
+        "url": EUROPE_URL,
+        "root": "Europa",
+        "fields": ("Temp", "Tlak", "VjetarSmjer", "VjetarBrzina", "Vrijeme"),
+    },
 }
 
 INTEGRATION_TYPES = ["sensor", "weather", "both"]
@@ -38,9 +107,48 @@ AVAILABLE_SENSORS = {
     "wind_direction": "Wind Direction",
     "condition": "Weather Condition",
     "latitude": "Latitude",
-    "longitude": "Longitude"
+    "longitude": "Longitude",
+    "dew_point": "Dew Point",
+    "apparent_temperature": "Apparent Temperature",
+    "wind_chill": "Wind Chill",
+    "heat_index": "Heat Index",
+}
+
+# <Podatci> field each data key is read from. Station coordinates are
+# always parsed, so latitude/longitude need no entry here.
+FEED_FIELDS = {
+    "temperature": "Temp",
+    "humidity": "Vlaga",
+    "pressure": "Tlak",
+    "pressure_tendency": "TlakTend",
+    "wind_speed": "VjetarBrzina",
+    "wind_direction": "VjetarSmjer",
+    "condition": "Vrijeme",
 }
 
+# <Podatci> fields each derived quantity is computed from
+DERIVED_FIELDS = {
+    "dew_point": ("Temp", "Vlaga"),
+    "apparent_temperature": ("Temp", "Vlaga", "VjetarBrzina"),
+    "wind_chill": ("Temp", "VjetarBrzina"),
+    "heat_index": ("Temp", "Vlaga"),
+}
+
+# Data keys read by the weather entity
+WEATHER_ENTITY_KEYS = (
+    "temperature",
+    "humidity",
+    "pressure",
+    "wind_speed",
+    "wind_direction",
+    "condition",
+    "apparent_temperature",
+    "dew_point",
+    # Where to look up the forecast
+    "latitude",
+    "longitude",
+)
+
 SENSOR_TYPES = {
     "temperature": {
         "name": AVAILABLE_SENSORS["temperature"],
@@ -104,7 +212,82 @@ SENSOR_TYPES = {
         "icon": "mdi:longitude",
         "device_class": None,
         "state_class": None,
-    }
+    },
+    "dew_point": {
+        "name": AVAILABLE_SENSORS["dew_point"],
+        "unit": UnitOfTemperature.CELSIUS,
+        "icon": "mdi:thermometer-water",
+        "device_class": SensorDeviceClass.TEMPERATURE,
+        "state_class": SensorStateClass.MEASUREMENT,
+        # Created disabled when all sensors of a city are added
+        "enabled_default": False,
+    },
+    "apparent_temperature": {
+        "name": AVAILABLE_SENSORS["apparent_temperature"],
+        "unit": UnitOfTemperature.CELSIUS,
+        "icon": "mdi:thermometer-lines",
+        "device_class": SensorDeviceClass.TEMPERATURE,
+        "state_class": SensorStateClass.MEASUREMENT,
+        # Created disabled when all sensors of a city are added
+        "enabled_default": False,
+    },
+    "wind_chill": {
+        "name": AVAILABLE_SENSORS["wind_chill"],
+        "unit": UnitOfTemperature.CELSIUS,
+        "icon": "mdi:snowflake-thermometer",
+        "device_class": SensorDeviceClass.TEMPERATURE,
+        "state_class": SensorStateClass.MEASUREMENT,
+        # Created disabled when all sensors of a city are added
+        "enabled_default": False,
+    },
+    "heat_index": {
+        "name": AVAILABLE_SENSORS["heat_index"],
+        "unit": UnitOfTemperature.CELSIUS,
+        "icon": "mdi:sun-thermometer",
+        "device_class": SensorDeviceClass.TEMPERATURE,
+        "state_class": SensorStateClass.MEASUREMENT,
+        # Created disabled when all sensors of a city are added
+        "enabled_default": False,
+    },
+}
+
+# Feed hub metrics, exposed as diagnostic sensors that are disabled by default
+DIAGNOSTIC_SENSOR_TYPES = {
+    "fetch_duration": {
+        "name": "Feed Fetch Duration",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "parse_duration": {
+        "name": "Feed Parse Duration",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-cog-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "download_size": {
+        "name": "Feed Download Size",
+        "unit": UnitOfInformation.BYTES,
+        "icon": "mdi:download",
+        "device_class": SensorDeviceClass.DATA_SIZE,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "loop_lag": {
+        "name": "Event Loop Lag",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:speedometer-slow",
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "cache_hit_ratio": {
+        "name": "Feed Cache Hit Ratio",
+        "unit": PERCENTAGE,
+        "icon": "mdi:cached",
+        "device_class": None,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
 }
 
 ATTRIBUTION = "Data provided by DHMZ (Croatian Meteorological and Hydrological Service)"
@@ -112,7 +295,7 @@ MANUFACTURER = "DHMZ"
 
 WEATHER_MAPPING = {
     # Clear & Sunny conditions
-    "vedro": "clear-night",  # when it's clear at night
+    "vedro": "sunny",  # clear sky; reported as clear-night after sunset
     "sunčano": "sunny",
     
     # Cloudy conditions
@@ -154,22 +337,56 @@ WEATHER_MAPPING = {
     "umjereno jak vjetar": "windy",
 }
 
-def get_weather_condition(vrijeme: str) -> str:
-    """Get the weather condition based on the vrijeme value."""
-    # First check for exact matches
-    if vrijeme in WEATHER_MAPPING:
-        return WEATHER_MAPPING[vrijeme]
-    
-    # Check for combined conditions
-    conditions = vrijeme.split(',')
-    if len(conditions) > 1:
-        # Check for wind + cloudy combinations
-        wind_conditions = {"povjetarac", "lahor", "jak vjetar", "vjetrovito", "slab vjetar", "umjeren vjetar", "umjereno jak vjetar"}
-        cloud_conditions = {"potpuno oblačno", "pretežno oblačno"}
-        
-        conditions = {cond.strip() for cond in conditions}
-        if conditions & wind_conditions and conditions & cloud_conditions:
-            return "windy-cloudy"
-    
-    # If no match found, return exceptional
-    return "exceptional"
+def get_feed_keys(country: str) -> tuple[str, ...]:
+    """Return the SENSOR_TYPES keys a feed can provide."""
+    return FEED_KEYS[country]
+
+def get_key_fields(key: str) -> tuple:
+    """Return the <Podatci> fields a data key needs parsed."""
+    if key in DERIVED_FIELDS:
+        return DERIVED_FIELDS[key]
+    if key in FEED_FIELDS:
+        return (FEED_FIELDS[key],)
+    return ()
+
+def get_station_id(config) -> str:
+    """Return the id used in unique ids and device identifiers of an entry.
+
+    Croatian cities keep their bare name so existing entities are unchanged.
+    """
+    country = config.get(CONF_COUNTRY, DEFAULT_COUNTRY)
+    if config.get(CONF_AUTO_STATION):
+        return f"{country}_{NEAREST_STATION}"
+    if config.get(CONF_ALL_STATIONS):
+        return f"{country}_{ALL_STATIONS}"
+    if config.get(CONF_VIRTUAL):
+        return f"{country}_{VIRTUAL_STATION}_{config['latitude']:.4f}_{config['longitude']:.4f}"
+    if country == DEFAULT_COUNTRY:
+        return config[CONF_CITY]
+    return f"{country}_{config[CONF_CITY]}"
+
+
+def _freeze(table):
+    """Return a read-only view of a static table and of the dicts nested in it."""
+    return MappingProxyType({
+        key: _freeze(value) if isinstance(value, dict) else value
+        for key, value in table.items()
+    })
+
+
+# Static tables are built once at import and shared read-only by every entry.
+SUPPORTED_COUNTRIES = _freeze(SUPPORTED_COUNTRIES)
+FEEDS = _freeze(FEEDS)
+AVAILABLE_SENSORS = _freeze(AVAILABLE_SENSORS)
+FEED_FIELDS = _freeze(FEED_FIELDS)
+DERIVED_FIELDS = _freeze(DERIVED_FIELDS)
+SENSOR_TYPES = _freeze(SENSOR_TYPES)
+DIAGNOSTIC_SENSOR_TYPES = _freeze(DIAGNOSTIC_SENSOR_TYPES)
+WEATHER_MAPPING = _freeze(WEATHER_MAPPING)
+# SENSOR_TYPES keys each feed can provide, in SENSOR_TYPES order
+FEED_KEYS = _freeze({
+    country: tuple(
+        key for key in SENSOR_TYPES if set(get_key_fields(key)) <= set(spec["fields"])
+    )
+    for country, spec in FEEDS.items()
+})
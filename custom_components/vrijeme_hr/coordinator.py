@@ -1,101 +1,958 @@
+import asyncio
+from collections.abc import Mapping
+from concurrent.futures import BrokenExecutor
 from datetime import timedelta
+import hashlib
 import logging
-import re
-import xmltodict
+import time
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from .const import CROATIA_URL
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DATA_FORECAST,
+    DATA_HUBS,
+    DATA_STORES,
+    DEFAULT_COUNTRY,
+    DOMAIN,
+    FEED_FIELDS,
+    FEEDS,
+    FORECAST_URL,
+    SCHEDULE_ADAPTIVE,
+    get_key_fields,
+)
+from .conditions import ConditionClassifier
+from .derived import compute_derived
+from .forecast import parse_forecast
+from .geo import StationIndex
+from .history import HISTORY_FIELDS, ObservationHistory
+from .interpolate import idw_weights, interpolate
+from .metrics import FeedMetrics, LoopLagProbe
+from .parser import parse_feed, parse_observation_time
+from .scheduler import CircuitBreaker, PublicationScheduler
+from .source import HttpFeedSource, feed_source
+from .table import Observation, StationTable
 
 _LOGGER = logging.getLogger(__name__)
 
-class VrijemeHrvatskaDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching weather feed data."""
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+# Past this age, the last good data is no longer served when polls fail.
+MAX_STALE_AGE = timedelta(hours=6)
+# Forecasts are served from cache this long, or retried this soon after a
+# failed fetch.
+FORECAST_TTL = timedelta(hours=3)
+FORECAST_RETRY = timedelta(minutes=15)
+
+
+def snapshot_store(hass: HomeAssistant, feed: str, source: str = None) -> Store:
+    """Return the store holding the last good result of a feed.
+
+    Feeds read from another ``source`` than DHMZ keep their own store, so
+    replayed data never stands in for the live feed. The store is shared, so
+    a hub re-created on reload loads a save its predecessor still has pending.
+    """
+    feed_name = FEEDS[feed]["url"].rsplit("/", 1)[-1].removesuffix(".xml")
+    if source:
+        feed_name += "_" + hashlib.sha256(source.encode()).hexdigest()[:8]
+    key = f"{DOMAIN}.{feed_name}"
+    stores = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_STORES, {})
+    store = stores.get(key)
+    if store is None:
+        store = stores[key] = Store(hass, STORAGE_VERSION, key)
+    return store
+
+
+def new_process_pool():
+    """Return a one-worker pool for parsing feeds in a separate process.
+
+    Imported here rather than at module load: only entries with the
+    ``parse_in_process`` option need multiprocessing, and this runs in an
+    executor.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
 
-    def __init__(self, hass, city, update_interval):
+@callback
+def async_get_forecast_hub(hass: HomeAssistant) -> "VrijemeHrvatskaForecastHub":
+    """Return the shared forecast hub, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_FORECAST not in domain_data:
+        domain_data[DATA_FORECAST] = VrijemeHrvatskaForecastHub(hass)
+    return domain_data[DATA_FORECAST]
+
+
+@callback
+def async_get_hub(
+    hass: HomeAssistant, feed: str = DEFAULT_COUNTRY, source: str = None
+) -> "VrijemeHrvatskaFeedHub":
+    """Return the shared hub for a feed and source, creating it on first use.
+
+    ``source`` overrides where the feed is read from (see source.py);
+    entries reading the same feed from different sources get separate hubs.
+    """
+    key = f"{feed}:{source}" if source else feed
+    hubs = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_HUBS, {})
+    hub = hubs.get(key)
+    if hub is None:
+        hub = hubs[key] = VrijemeHrvatskaFeedHub(hass, feed, source)
+    return hub
+
+
+class VrijemeHrvatskaFeedHub(DataUpdateCoordinator):
+    """Fetch a feed once per cycle and share its StationTable with subscribers."""
+
+    def __init__(self, hass, feed, source=None):
         """Initialize."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"vrijeme_hr_feed_{feed}",
+            update_interval=None,
+            # Unchanged feeds return the previous result, which must not
+            # wake subscribers.
+            always_update=False,
+        )
+
+        self.feed = feed
+        self.key = f"{feed}:{source}" if source else feed
+        self.source = feed_source(source or FEEDS[feed]["url"])
+        self.url = self.source.location
+        self.observed_at = None
+        self.fetched_at = None
+        # Last time the server confirmed the data, changed or not.
+        self.validated_at = None
+        # True while data comes from the persisted snapshot, not the network.
+        self.restored = False
+        self._subscribers = set()
+        self._scheduler = PublicationScheduler()
+        self.breaker = CircuitBreaker()
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_count = 0
+        self._projection_changed = False
+        self._projection = None
+        self._digest = None
+        # Validators of the last parsed document, to revalidate it with.
+        self._validators = None
+        self._store = snapshot_store(hass, feed, source)
+        self._snapshot_loaded = False
+        self.metrics = FeedMetrics()
+        self.conditions = ConditionClassifier()
+        self.history = ObservationHistory()
+        self._station_index = None
+        self._virtual_weights = {}
+        # Created on first use while a subscriber has parse_in_process set.
+        self._process_pool = None
+        self._process_pool_failed = False
+
+    @property
+    def parse_in_process(self) -> bool:
+        """Return whether a subscriber asked for parsing in a worker process."""
+        return any(coordinator.parse_in_process for coordinator in self._subscribers)
+
+    def diagnostics(self) -> dict:
+        """Return the hub's state for the diagnostics download."""
+        return {
+            "hub": {
+                "feed": self.feed,
+                "url": self.url,
+                "subscribers": len(self._subscribers),
+                "stations": 0 if self.data is None else len(self.data),
+                "update_interval": self.update_interval and self.update_interval.total_seconds(),
+                "last_update_success": self.last_update_success,
+                "restored": self.restored,
+                "validated_at": self.validated_at and self.validated_at.isoformat(),
+                "fetched_at": self.fetched_at and self.fetched_at.isoformat(),
+                "observed_at": self.observed_at and self.observed_at.isoformat(),
+                "source": self.source.as_dict(),
+                "validators": self._validators,
+                "parse_in_process": self.parse_in_process,
+            },
+            "scheduler": self._scheduler.as_dict(),
+            "breaker": self.breaker.as_dict(),
+            "history_stations": len(self.history),
+            "metrics": self.metrics.as_dict(),
+            "unmapped_conditions": dict(self.conditions.unmapped.most_common()),
+        }
+
+    @callback
+    def async_subscribe(self, coordinator) -> CALLBACK_TYPE:
+        """Subscribe a city coordinator; returns a callback that unsubscribes it."""
+        self._subscribers.add(coordinator)
+        self._update_poll_interval()
+        self.async_check_projection(coordinator)
+        remove_listener = self.async_add_listener(coordinator.async_handle_hub_update)
+
+        @callback
+        def _unsubscribe() -> None:
+            remove_listener()
+            self._subscribers.discard(coordinator)
+            self._virtual_weights.pop(coordinator, None)
+            if self._subscribers:
+                self._update_poll_interval()
+                return
+            # Last subscriber gone, tear the hub down.
+            hubs = self.hass.data.get(DOMAIN, {}).get(DATA_HUBS, {})
+            if hubs.get(self.key) is self:
+                hubs.pop(self.key)
+            self.hass.async_create_task(self.async_shutdown())
+
+        return _unsubscribe
+
+    @callback
+    def async_check_projection(self, coordinator) -> None:
+        """Schedule a re-parse if the last one skipped what a subscriber needs."""
+        if self.data is not None and (
+            not coordinator.cities <= self.data.index.keys()
+            or not coordinator.fields <= self._projection[1]
+        ):
+            self._projection_changed = True
+
+    @property
+    def stale(self) -> bool:
+        """Return whether the data could not be confirmed by the last poll."""
+        return self.restored or self.breaker.failures > 0
+
+    @property
+    def projection_changed(self) -> bool:
+        """Return whether a subscriber needs data the last parse skipped."""
+        return self._projection_changed
+
+    @property
+    def station_index(self):
+        """Return the spatial index of all stations in the feed, or None."""
+        return None if self.data is None else self._index_of(self.data)
+
+    def _index_of(self, table) -> StationIndex:
+        """Return the spatial index of a table's catalogue, built once per table."""
+        if self._station_index is None or self._station_index[0] is not table:
+            self._station_index = (table, StationIndex.from_table(table))
+        return self._station_index[1]
+
+    def virtual_weights(self, coordinator, table=None):
+        """Return the IDW neighbours and weights of a virtual station."""
+        table = table if table is not None else self.data
+        if table is None:
+            return ()
+        index = self._index_of(table)
+        key = (index, coordinator.point, coordinator.neighbours)
+        cached = self._virtual_weights.get(coordinator)
+        if cached is None or cached[0] != key:
+            cached = self._virtual_weights[coordinator] = (
+                key,
+                idw_weights(index, *coordinator.point, coordinator.neighbours),
+            )
+        return cached[1]
+
+    def virtual_values(self, coordinator):
+        """Return the interpolated data of a virtual station, or None."""
+        table = self.data
+        if table is None:
+            return None
+        key = (coordinator.point, coordinator.neighbours)
+        if key not in table.virtual:
+            # Subscribed after the last parse.
+            table.virtual.update(interpolate(table, {key: self.virtual_weights(coordinator)}))
+        return table.virtual[key]
+
+    def _update_poll_interval(self) -> None:
+        """Poll as often as the most demanding subscriber asked for.
+
+        Adaptive subscribers are served by the publication scheduler, with
+        their configured interval as the longest allowed gap between polls.
+        After a failed poll, the breaker's backoff may bring the retry forward.
+        """
+        fixed = []
+        adaptive = []
+        for coordinator in self._subscribers:
+            if coordinator.schedule_mode == SCHEDULE_ADAPTIVE:
+                adaptive.append(coordinator.requested_interval)
+            else:
+                fixed.append(coordinator.requested_interval)
+
+        intervals = [timedelta(seconds=seconds) for seconds in fixed]
+        if adaptive:
+            intervals.append(
+                self._scheduler.next_interval(
+                    dt_util.utcnow(), timedelta(seconds=min(adaptive))
+                )
+            )
+        retry = self.breaker.next_interval(dt_util.utcnow())
+        if intervals and retry is not None:
+            intervals.append(retry)
+        if intervals:
+            self.update_interval = min(intervals)
+
+    async def async_restore(self) -> None:
+        """Load the last good feed result persisted by a previous run."""
+        async with self._refresh_lock:
+            if self._snapshot_loaded or self.data is not None:
+                return
+            self._snapshot_loaded = True
+            try:
+                snapshot = await self._store.async_load()
+                if not snapshot:
+                    return
+                table = StationTable.from_dict(snapshot["table"])
+                projection = (set(snapshot["cities"]), set(snapshot["fields"]))
+                fetched_at = dt_util.parse_datetime(snapshot["fetched_at"])
+                observed_at = snapshot["observed_at"]
+                # Snapshots written before the history was persisted lack it.
+                history = ObservationHistory.from_dict(snapshot.get("history", {}))
+            except Exception as err:
+                _LOGGER.warning("Ignoring unreadable snapshot of %s: %s", self.url, err)
+                return
+
+        self._projection = projection
+        self.fetched_at = self.validated_at = fetched_at
+        self.observed_at = observed_at and dt_util.parse_datetime(observed_at)
+        self.restored = True
+        self.history = history
+        self._derive(table)
+        self.async_set_updated_data(table)
+        _LOGGER.debug("Restored %d stations of %s from %s", len(table), self.url, fetched_at)
+
+    def _derive(self, table) -> None:
+        """Compute conditions, derived quantities and virtual stations, once per poll."""
+        compute_derived(table)
+        table.conditions = self.conditions.classify_table(
+            table,
+            self.observed_at or self.fetched_at or dt_util.utcnow(),
+            self.hass.config.latitude,
+            self.hass.config.longitude,
+        )
+        points = {
+            (coordinator.point, coordinator.neighbours): self.virtual_weights(coordinator, table)
+            for coordinator in self._subscribers
+            if coordinator.point is not None
+        }
+        if points:
+            table.virtual = interpolate(table, points)
+
+    @callback
+    def _snapshot(self) -> dict:
+        """Return the current result in storable form."""
+        cities, fields = self._projection
+        return {
+            "fetched_at": self.fetched_at.isoformat(),
+            "observed_at": self.observed_at and self.observed_at.isoformat(),
+            "cities": sorted(cities),
+            "fields": sorted(fields),
+            "table": self.data.as_dict(),
+            "history": self.history.as_dict(),
+        }
+
+    async def async_ensure_data(self) -> None:
+        """Make sure the feed has been fetched at least once since startup.
+
+        Subscribers setting up concurrently share a single fetch: whoever
+        waited on the lock while another refresh ran reuses its outcome.
+        """
+        if (
+            self.data is not None
+            and self.last_update_success
+            and not self._projection_changed
+            and not self.restored
+        ):
+            return
+        seen = self._refresh_count
+        async with self._refresh_lock:
+            if seen != self._refresh_count:
+                return
+            await self.async_refresh()
+            self._refresh_count += 1
+
+    async def _async_update_data(self):
+        """Fetch the feed, keeping only what subscribers need."""
+        cities = set().union(*(coordinator.cities for coordinator in self._subscribers))
+        fields = set().union(*(coordinator.fields for coordinator in self._subscribers))
+        projection = (cities, fields)
+        # The previous result can only stand in for this one if it was
+        # parsed with the same projection. A restored snapshot never does,
+        # so subscribers are always told once the data is live again.
+        reusable = (
+            self.data is not None
+            and projection == self._projection
+            and not self.restored
+        )
+        self._projection_changed = False
+
+        self.metrics.counters["polls"] += 1
+        status = (self.stale, self.breaker.failures)
+        probe = LoopLagProbe(self.hass.loop)
+        start = time.perf_counter()
+        try:
+            data = await self._async_revalidate(projection, reusable)
+        except UpdateFailed:
+            # Nothing to serve; still retry on the backoff schedule.
+            self._update_poll_interval()
+            raise
+        finally:
+            self.metrics.record_time("total", time.perf_counter() - start)
+            self.metrics.record_time("loop_lag", probe.stop())
+            self.metrics.notify()
+        changed = data is not self.data
+        self._scheduler.record(dt_util.utcnow(), changed, self.observed_at)
+        self._update_poll_interval()
+        if not changed and status != (self.stale, self.breaker.failures):
+            # The same table does not wake listeners; tell subscribers the
+            # data went stale or was confirmed again.
+            self.hass.loop.call_soon(self.async_update_listeners)
+        return data
+
+    async def _async_revalidate(self, projection, reusable):
+        """Fetch through the circuit breaker, serving the last good data on failure."""
+        now = dt_util.utcnow()
+        try:
+            if not self.breaker.allow_request(now):
+                self.metrics.counters["short_circuited"] += 1
+                raise UpdateFailed(
+                    f"Not fetching {self.url} after {self.breaker.failures} failures "
+                    f"until {self.breaker.retry_at.isoformat()}"
+                )
+            try:
+                data = await self._async_fetch(projection, reusable)
+            except UpdateFailed:
+                self.breaker.record_failure(now)
+                raise
+        except UpdateFailed as err:
+            if self.data is None or now - self.validated_at > MAX_STALE_AGE:
+                raise
+            log = _LOGGER.warning if self.breaker.failures == 1 else _LOGGER.debug
+            log(
+                "Error fetching %s, serving data from %s (retry at %s): %s",
+                self.url,
+                self.validated_at.isoformat(),
+                self.breaker.retry_at.isoformat(),
+                err,
+            )
+            return self.data
+
+        if self.breaker.failures:
+            _LOGGER.info("%s recovered after %d failures", self.url, self.breaker.failures)
+        self.breaker.record_success()
+        self.validated_at = dt_util.utcnow()
+        return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Push the new table to subscribers, timing the fan-out."""
+        start = time.perf_counter()
+        super().async_update_listeners()
+        self.metrics.record_time("dispatch", time.perf_counter() - start)
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and release the parse worker process."""
+        await super().async_shutdown()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    async def _async_parse(self, body, cities, fields):
+        """Parse a downloaded body off the event loop.
+
+        While a subscriber has ``parse_in_process`` set, the feed is parsed
+        in a worker process, so a large document does not hold the GIL
+        against the loop; otherwise it goes to HA's thread executor. Either
+        way only the projected table comes back.
+        """
+        args = (parse_feed, body, FEEDS[self.feed]["root"], cities, fields)
+        if not self.parse_in_process and self._process_pool is not None:
+            # The entry that wanted it is gone.
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        if self.parse_in_process and not self._process_pool_failed:
+            try:
+                if self._process_pool is None:
+                    self._process_pool = await self.hass.async_add_executor_job(new_process_pool)
+                return await self.hass.loop.run_in_executor(self._process_pool, *args)
+            except (BrokenExecutor, OSError) as err:
+                _LOGGER.warning(
+                    "Parse worker for %s failed, parsing in a thread instead: %s",
+                    self.url,
+                    err,
+                )
+                self._process_pool_failed = True
+                if self._process_pool is not None:
+                    self._process_pool.shutdown(wait=False, cancel_futures=True)
+                    self._process_pool = None
+        return await self.hass.async_add_executor_job(*args)
+
+    async def _async_fetch(self, projection, reusable):
+        """Read and parse the feed, or return the previous result if unchanged."""
+        cities, fields = projection
+
+        metrics = self.metrics
+        try:
+            body, validators = await self.source.async_read(
+                self.hass, metrics, self._validators if reusable else None
+            )
+            if body is None:
+                _LOGGER.debug("%s not modified", self.url)
+                metrics.counters["not_modified"] += 1
+                return self.data
+            metrics.bytes.add(len(body))
+
+            digest = hashlib.sha256(body).digest()
+            if reusable and digest == self._digest:
+                # Server ignored the validators, but the body is unchanged.
+                _LOGGER.debug("%s content unchanged", self.url)
+                metrics.counters["unchanged"] += 1
+                self._validators = validators
+                return self.data
+
+            data, header, parse_time, blocks = await self._async_parse(body, cities, fields)
+            metrics.record_time("parse", parse_time)
+            metrics.parse_blocks.add(blocks)
+            metrics.counters["changed"] += 1
+            self.observed_at = parse_observation_time(header)
+            self.history.record(data, self.observed_at or dt_util.utcnow())
+            # DHMZ sometimes shows "-" for the tendency; compute it from the
+            # last three hours, or keep the previous one.
+            self.history.fill_pressure_tendency(data)
+            if self.data is not None:
+                data.carry_forward("TlakTend", self.data)
+            self._derive(data)
+            self._projection = projection
+            self._digest = digest
+            # Only now: validators of a document that failed to parse would
+            # have the next poll confirm the old table as current.
+            self._validators = validators
+            self.fetched_at = dt_util.utcnow()
+            self.restored = False
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+            return data
+
+        except Exception as err:
+            metrics.counters["failed"] += 1
+            raise UpdateFailed(f"Error fetching data: {err}") from err
+
+
+class VrijemeHrvatskaDataUpdateCoordinator(DataUpdateCoordinator):
+    """Class to manage the weather data of a single city."""
+
+    # Set on virtual stations, interpolated at a point from its neighbours.
+    point = None
+    neighbours = None
+
+    def __init__(
+        self,
+        hass,
+        hub,
+        city,
+        update_interval,
+        keys,
+        schedule_mode,
+        location=None,
+        parse_in_process=False,
+    ):
+        """Initialize.
+
+        With a ``location`` (latitude, longitude), the coordinator follows
+        the nearest station: if its city leaves the feed, it switches over.
+        ``parse_in_process`` asks the hub to parse in a worker process.
+        """
+        # No timer of its own: the shared hub pushes fresh data to us.
         super().__init__(
             hass,
             _LOGGER,
             name=f"vrijeme_hr_{city}",
-            update_interval=timedelta(seconds=update_interval),
+            update_interval=None,
         )
-        
+
+        self.hub = hub
         self.city = city
-        self.url = CROATIA_URL
-
-    def _clean_num(self, value) -> str:
-        """Normalize numeric string from XML (remove ANSI/control chars and symbols)."""
-        if value is None:
-            return ""
-        text = str(value).strip()
-        # Strip ANSI escape sequences and keep numeric-relevant characters only.
-        text = re.sub(r"\x1B\[[0-9;?]*[ -/]*[@-~]", "", text)
-        text = re.sub(r"[^0-9+\-.,]", "", text)
-        # XML sometimes contains commas as decimal separators.
-        return text.replace(",", ".")
-
-    def _to_float(self, value):
-        """Convert XML numeric value to float safely."""
-        text = self._clean_num(value)
-        if not text or text == "-":
+        self.requested_interval = update_interval
+        self.schedule_mode = schedule_mode
+        self.location = location
+        self.parse_in_process = parse_in_process
+        self.keys = frozenset(keys)
+        self.fields = set().union(*(get_key_fields(key) for key in keys))
+        if "TlakTend" in self.fields:
+            # A missing tendency is computed from the pressure history.
+            self.fields.add("Tlak")
+        self._key_listeners = {}
+        self._notified_data = {}
+        self._notified_status = None
+
+    @property
+    def cities(self) -> set:
+        """Return the stations this coordinator reads from the feed."""
+        return {self.city}
+
+    @property
+    def stale_attributes(self):
+        """Return state attributes flagging data the last poll could not confirm."""
+        hub = self.hub
+        if not hub.stale:
             return None
+        attributes = {
+            "stale": True,
+            "fetched_at": hub.fetched_at.isoformat(),
+            "age": int((dt_util.utcnow() - hub.validated_at).total_seconds()),
+        }
+        if hub.breaker.failures:
+            attributes["failures"] = hub.breaker.failures
+            attributes["retry_at"] = hub.breaker.retry_at.isoformat()
+        return attributes
+
+    def observed_values(self):
+        """Yield ``(station, key, value)`` of every data key this coordinator serves."""
+        if isinstance(self.data, Mapping):
+            for key in self.keys:
+                yield self.city, key, self.data.get(key)
+
+    def history_attributes(self, key, city=None):
+        """Return rolling statistics and the trend of a data key."""
+        field = FEED_FIELDS.get(key)
+        if field not in HISTORY_FIELDS:
+            return {}
+        return self.hub.history.attributes(city or self.city, field)
+
+    @callback
+    def async_add_listener(self, update_callback, context=None):
+        """Listen for updates; a key (or tuple of keys) context narrows them.
+
+        Keyed listeners are only called when one of their values changed,
+        availability or staleness flipped or another poll failed, so
+        unchanged entities skip the state write.
+        """
+        if context is None:
+            return super().async_add_listener(update_callback, context)
+
+        keys = self._listener_keys(context)
+        for key in keys:
+            self._key_listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            for key in keys:
+                self._key_listeners[key].remove(update_callback)
+                if not self._key_listeners[key]:
+                    del self._key_listeners[key]
+
+        return remove_listener
+
+    @staticmethod
+    def _listener_keys(context) -> tuple:
+        """Return the keys a listener context stands for."""
+        return (context,) if isinstance(context, str) else tuple(context)
+
+    def _listener_value(self, key):
+        """Return the current value a keyed listener watches.
+
+        Keys with history include its summary, so the rolling statistics
+        attributes are written even while the value itself holds steady.
+        """
+        value = self.data.get(key) if isinstance(self.data, Mapping) else None
+        history = self.history_attributes(key)
+        return (value, *history.values()) if history else value
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update plain listeners and the keyed listeners whose value changed."""
+        super().async_update_listeners()
+
+        values = {key: self._listener_value(key) for key in self._key_listeners}
+        status = (self.last_update_success, self.hub.stale, self.hub.breaker.failures)
+        if status != self._notified_status:
+            changed = set(values)
+        else:
+            changed = {
+                key
+                for key, value in values.items()
+                if value != self._notified_data.get(key)
+            }
+        self._notified_data = values
+        self._notified_status = status
+
+        # An entity listening on several changed keys is written once.
+        callbacks = {}
+        for key in changed:
+            for update_callback in self._key_listeners[key]:
+                callbacks[update_callback] = None
+        for update_callback in callbacks:
+            update_callback()
+
+    @callback
+    def async_handle_hub_update(self) -> None:
+        """Take our city's slice of a fresh hub result."""
+        city = self.city
         try:
-            return float(text)
-        except (TypeError, ValueError):
-            return None
+            data = self._extract_city()
+        except UpdateFailed as err:
+            self.async_set_update_error(err)
+            if self.city != city:
+                # Switched to a station the last parse skipped; fetch it.
+                self.hass.async_create_task(self.async_refresh())
+            return
+        self.async_set_updated_data(data)
 
-    def _to_int(self, value):
-        """Convert XML numeric value to int safely."""
-        parsed = self._to_float(value)
-        if parsed is None:
-            return None
+    @callback
+    def async_restore(self) -> bool:
+        """Serve the city from a restored hub snapshot; returns whether it could."""
+        if self.hub.data is None:
+            return False
         try:
-            return int(round(parsed))
-        except (TypeError, ValueError):
-            return None
+            data = self._extract_city()
+        except UpdateFailed:
+            return False
+        self.async_set_updated_data(data)
+        return True
 
     async def _async_update_data(self):
-        """Fetch data from source feed."""
-        session = async_get_clientsession(self.hass)
+        """Return the city's data, fetching the shared feed if needed."""
+        await self.hub.async_ensure_data()
+        city = self.city
         try:
-            async with session.get(self.url, timeout=30) as response:
-                if response.status != 200:
-                    raise UpdateFailed(f"Error fetching data: {response.status}")
-
-                xml_data = await response.text()
-                data = xmltodict.parse(xml_data)
-
-                # Find selected city in feed.
-                city_data = None
-                for grad in data["Hrvatska"]["Grad"]:
-                    if grad["GradIme"] == self.city:
-                        city_data = grad
-                        break
-
-                if city_data is None:
-                    raise UpdateFailed(f"City {self.city} not found in data")
-
-                pod = city_data.get("Podatci", {})
-                previous = self.data if isinstance(self.data, dict) else {}
-                wind_direction = str(pod.get("VjetarSmjer", "")).strip()
-                if wind_direction in {"", "-"}:
-                    wind_direction = None
-                vrijeme_raw = str(pod.get("Vrijeme", "")).strip()
-                pressure_tendency = self._to_float(pod.get("TlakTend"))
-                if pressure_tendency is None:
-                    pressure_tendency = previous.get("pressure_tendency")
-
-                return {
-                    "temperature": self._to_float(pod.get("Temp")),
-                    "humidity": self._to_int(pod.get("Vlaga")),
-                    "pressure": self._to_float(pod.get("Tlak")),
-                    "pressure_tendency": pressure_tendency,
-                    "wind_speed": self._to_float(pod.get("VjetarBrzina")),
-                    "wind_direction": wind_direction,
-                    "vrijeme": vrijeme_raw.lower() if vrijeme_raw not in {"", "-"} else "",
-                    "latitude": self._to_float(city_data.get("Lat")),
-                    "longitude": self._to_float(city_data.get("Lon")),
-                }
+            return self._extract_city()
+        except UpdateFailed:
+            if self.city == city:
+                raise
+        await self.hub.async_ensure_data()
+        return self._extract_city()
+
+    def _extract_city(self):
+        """Return the city's Observation from the shared hub table."""
+        if not self.hub.last_update_success or self.hub.data is None:
+            raise UpdateFailed(f"Error fetching data: {self.hub.last_exception}")
+
+        row = self.hub.data.row(self.city)
+        if row is None and self._reselect():
+            row = self.hub.data.row(self.city)
+        if row is None:
+            raise UpdateFailed(f"City {self.city} not found in data")
+        return Observation(row)
+
+    def _reselect(self) -> bool:
+        """Switch to the nearest station still in the feed; returns whether it did."""
+        if self.location is None:
+            return False
+        index = self.hub.station_index
+        nearest = index.nearest(*self.location) if index is not None else []
+        if not nearest or nearest[0][0] == self.city:
+            return False
+        _LOGGER.warning(
+            "Station %s is no longer in the feed, switching to %s (%.1f km away)",
+            self.city,
+            nearest[0][0],
+            nearest[0][1],
+        )
+        self.city = nearest[0][0]
+        self.hub.async_check_projection(self)
+        return True
+
+
+class VrijemeHrvatskaVirtualCoordinator(VrijemeHrvatskaDataUpdateCoordinator):
+    """Weather at a point between stations, interpolated from the nearest ones."""
+
+    def __init__(self, hass, hub, name, point, neighbours, stations, **kwargs):
+        """Initialize.
+
+        ``stations`` are the neighbours picked at setup from the catalogue,
+        used until the hub has a table to pick them from.
+        """
+        super().__init__(hass, hub, name, **kwargs)
+        self.point = point
+        self.neighbours = neighbours
+        self._stations = set(stations)
+
+    @property
+    def cities(self) -> set:
+        """Return the neighbouring stations interpolated from."""
+        weights = self.hub.virtual_weights(self)
+        return {name for name, _ in weights} if weights else self._stations
+
+    def history_attributes(self, key, city=None):
+        """Return no history; it is only kept for real stations."""
+        return {}
+
+    def _extract_city(self):
+        """Return the interpolated values at the point."""
+        if not self.hub.last_update_success or self.hub.data is None:
+            raise UpdateFailed(f"Error fetching data: {self.hub.last_exception}")
+
+        values = self.hub.virtual_values(self)
+        if values is None or values["temperature"] is None:
+            self.hub.async_check_projection(self)
+            raise UpdateFailed(f"No neighbouring stations of {self.city} in data")
+        return Observation({**values, "latitude": self.point[0], "longitude": self.point[1]})
+
 
+class VrijemeHrvatskaAllStationsCoordinator(VrijemeHrvatskaDataUpdateCoordinator):
+    """Serve every station of a feed, parsing only those with enabled entities.
+
+    Its data is the hub's StationTable itself. Entities listen with a
+    ``(station, key)`` context, so a poll only touches the enabled ones
+    whose value changed.
+    """
+
+    def __init__(self, hass, hub, name, **kwargs):
+        """Initialize; nothing is parsed until entities are enabled."""
+        super().__init__(hass, hub, name, **kwargs)
+        self.fields = set()
+        self._enabled = set()
+        # Observations of the current table, built on first read.
+        self._observations = (None, {})
+
+    @property
+    def cities(self) -> set:
+        """Return the stations with at least one enabled entity."""
+        return {city for city, _ in self._enabled}
+
+    @property
+    def stations(self) -> list:
+        """Return every station in the feed, sorted."""
+        return sorted(set(self.hub.data.catalogue)) if self.hub.data is not None else []
+
+    @callback
+    def async_set_enabled(self, enabled) -> bool:
+        """Set the ``(station, key)`` pairs entities exist for.
+
+        Returns whether the current hub table lacks some of them, in which
+        case the caller should refresh.
+        """
+        self._enabled = set(enabled)
+        self.fields = set().union(*(get_key_fields(key) for _, key in self._enabled))
+        if "TlakTend" in self.fields:
+            self.fields.add("Tlak")
+        self.hub.async_check_projection(self)
+        return self.hub.projection_changed
+
+    def row(self, city):
+        """Return a station's Observation from the current table, or None."""
+        table = self.data
+        if not isinstance(table, StationTable):
+            return None
+        if self._observations[0] is not table:
+            self._observations = (table, {})
+        observations = self._observations[1]
+        if city not in observations:
+            row = table.row(city)
+            observations[city] = None if row is None else Observation(row)
+        return observations[city]
+
+    def observed_values(self):
+        """Yield ``(station, key, value)`` of every enabled pair."""
+        for city, key in self._enabled:
+            row = self.row(city)
+            yield city, key, None if row is None else row.get(key)
+
+    @staticmethod
+    def _listener_keys(context) -> tuple:
+        """Return the single ``(station, key)`` pair of a listener context."""
+        return (context,)
+
+    def _listener_value(self, key):
+        """Return the value of a ``(station, key)`` pair, with its history summary."""
+        station, data_key = key
+        row = self.row(station)
+        value = None if row is None else row.get(data_key)
+        history = self.history_attributes(data_key, station)
+        return (value, *history.values()) if history else value
+
+    def _extract_city(self):
+        """Return the shared hub table."""
+        if not self.hub.last_update_success or self.hub.data is None:
+            raise UpdateFailed(f"Error fetching data: {self.hub.last_exception}")
+        return self.hub.data
+
+
+class VrijemeHrvatskaForecastHub(DataUpdateCoordinator):
+    """Cache the DHMZ forecast feed on its own slow tier, fetched on demand.
+
+    It has no poll timer. Weather entities read it from their
+    ``async_forecast_*`` methods, which Home Assistant only calls while
+    forecasts are subscribed to or requested, and a fetch happens only when
+    the cached ForecastTable is older than FORECAST_TTL. Concurrent reads
+    share one fetch, and the observation path never waits on it. It is
+    torn down when the last weather entity unsubscribes.
+    """
+
+    def __init__(self, hass):
+        """Initialize."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="vrijeme_hr_forecast",
+            update_interval=None,
+            always_update=False,
+        )
+        self.source = HttpFeedSource(FORECAST_URL)
+        self.metrics = FeedMetrics()
+        self.expires_at = None
+        self._validators = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def fresh(self) -> bool:
+        """Return whether the cache can be served without a fetch."""
+        return self.expires_at is not None and dt_util.utcnow() < self.expires_at
+
+    def diagnostics(self) -> dict:
+        """Return the forecast cache's state for the diagnostics download."""
+        table = self.data
+        return {
+            "places": 0 if table is None else len(table.hourly),
+            "expires_at": self.expires_at and self.expires_at.isoformat(),
+            "last_update_success": self.last_update_success,
+            "source": self.source.as_dict(),
+            "metrics": self.metrics.as_dict(),
+            "unmapped_symbols": {} if table is None else dict(table.unmapped.most_common()),
+        }
+
+    @callback
+    def async_subscribe(self, update_callback) -> CALLBACK_TYPE:
+        """Call ``update_callback`` when the forecast changes; returns the unsubscribe."""
+        remove_listener = self.async_add_listener(update_callback)
+
+        @callback
+        def _unsubscribe() -> None:
+            remove_listener()
+            if self._listeners:
+                return
+            # Last weather entity gone, drop the cache.
+            domain_data = self.hass.data.get(DOMAIN, {})
+            if domain_data.get(DATA_FORECAST) is self:
+                domain_data.pop(DATA_FORECAST)
+            self.hass.async_create_task(self.async_shutdown())
+
+        return _unsubscribe
+
+    async def async_ensure_fresh(self) -> None:
+        """Refresh the cache if it expired; concurrent callers share the fetch."""
+        if self.fresh:
+            return
+        async with self._lock:
+            if not self.fresh:
+                await self.async_refresh()
+
+    def forecast(self, latitude, longitude, kind: str):
+        """Return the cached ``hourly`` or ``daily`` forecast nearest a point, or None."""
+        table = self.data
+        if table is None or latitude is None or longitude is None:
+            return None
+        place = table.nearest(latitude, longitude)
+        return None if place is None else getattr(table, kind).get(place)
+
+    async def _async_update_data(self):
+        """Fetch and parse the forecast feed, keeping the old one on failure."""
+        try:
+            body, validators = await self.source.async_read(
+                self.hass, self.metrics, self._validators if self.data is not None else None
+            )
+            data = self.data
+            if body is not None:
+                data = await self.hass.async_add_executor_job(parse_forecast, body)
+            self._validators = validators
         except Exception as err:
-            raise UpdateFailed(f"Error fetching data: {err}") from err
+            self.expires_at = dt_util.utcnow() + FORECAST_RETRY
+            if self.data is not None:
+                _LOGGER.warning("Error fetching %s, keeping the cached forecast: %s", FORECAST_URL, err)
+                return self.data
+            raise UpdateFailed(f"Error fetching forecast: {err}") from err
+        self.expires_at = dt_util.utcnow() + FORECAST_TTL
+        return data
@@ -0,0 +1,77 @@
+"""Derived meteorological quantities, computed for a whole table at once."""
+from array import array
+import math
+
+from .table import QUANTITY_KEYS
+
+# Wind chill is only defined at or below 10 °C with wind above 4.8 km/h,
+# the heat index at or above 26.7 °C (80 °F); outside that they equal the
+# air temperature.
+WIND_CHILL_MAX_TEMP = 10.0
+WIND_CHILL_MIN_WIND = 4.8
+HEAT_INDEX_MIN_TEMP = 26.7
+
+
+def dew_point(temp: float, humidity: float) -> float:
+    """Return the dew point in °C (Magnus formula)."""
+    if humidity <= 0:
+        return math.nan
+    gamma = math.log(humidity / 100) + 17.625 * temp / (243.04 + temp)
+    return 243.04 * gamma / (17.625 - gamma)
+
+
+def apparent_temperature(temp: float, humidity: float, wind_kmh: float) -> float:
+    """Return the apparent temperature in °C (Steadman, as used by the BoM)."""
+    vapour_pressure = humidity / 100 * 6.105 * math.exp(17.27 * temp / (237.7 + temp))
+    return temp + 0.33 * vapour_pressure - 0.70 * wind_kmh / 3.6 - 4.00
+
+
+def wind_chill(temp: float, wind_kmh: float) -> float:
+    """Return the wind chill in °C (JAG/TI formula, wind in km/h)."""
+    if temp > WIND_CHILL_MAX_TEMP or wind_kmh <= WIND_CHILL_MIN_WIND:
+        return temp
+    factor = wind_kmh**0.16
+    return 13.12 + 0.6215 * temp - 11.37 * factor + 0.3965 * temp * factor
+
+
+def heat_index(temp: float, humidity: float) -> float:
+    """Return the heat index in °C (NWS Rothfusz regression)."""
+    if temp < HEAT_INDEX_MIN_TEMP:
+        return temp
+    t = temp * 9 / 5 + 32
+    rh = humidity
+    index = (
+        -42.379
+        + 2.04901523 * t
+        + 10.14333127 * rh
+        - 0.22475541 * t * rh
+        - 0.00683783 * t * t
+        - 0.05481717 * rh * rh
+        + 0.00122874 * t * t * rh
+        + 0.00085282 * t * rh * rh
+        - 0.00000199 * t * t * rh * rh
+    )
+    if rh < 13 and 80 <= t <= 112:
+        index -= (13 - rh) / 4 * math.sqrt((17 - abs(t - 95)) / 17)
+    elif rh > 85 and 80 <= t <= 87:
+        index += (rh - 85) / 10 * (87 - t) / 5
+    return max((index - 32) * 5 / 9, temp)
+
+
+def compute_derived(table) -> None:
+    """Fill ``table.derived`` with one column per quantity, NaN where unknown."""
+    temps = table.numeric["Temp"]
+    humidities = table.numeric["Vlaga"]
+    winds = table.numeric["VjetarBrzina"]
+    columns = {key: array("d") for key in QUANTITY_KEYS}
+    nan = math.nan
+    for temp, humidity, wind in zip(temps, humidities, winds):
+        has_humidity = not math.isnan(humidity)
+        has_wind = not math.isnan(wind)
+        columns["dew_point"].append(dew_point(temp, humidity) if has_humidity else nan)
+        columns["apparent_temperature"].append(
+            apparent_temperature(temp, humidity, wind) if has_humidity and has_wind else nan
+        )
+        columns["wind_chill"].append(wind_chill(temp, wind) if has_wind else nan)
+        columns["heat_index"].append(heat_index(temp, humidity) if has_humidity else nan)
+    table.derived = columns
@@ -0,0 +1,38 @@
+"""Diagnostics support for Vrijeme HR."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_FORECAST, DOMAIN
+
+TO_REDACT = {CONF_LATITUDE, CONF_LONGITUDE}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    hub = coordinator.hub
+    forecast = hass.data[DOMAIN].get(DATA_FORECAST)
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "city": {
+            "name": coordinator.city,
+            "follows_nearest": coordinator.location is not None,
+            "in_feed": hub.data is not None and coordinator.city in hub.data,
+            "stations": sorted(coordinator.cities),
+            "fields": sorted(coordinator.fields),
+            "schedule_mode": coordinator.schedule_mode,
+            "requested_interval": coordinator.requested_interval,
+        },
+        **hub.diagnostics(),
+        "forecast": None if forecast is None else forecast.diagnostics(),
+    }
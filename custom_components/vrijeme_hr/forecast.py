@@ -0,0 +1,198 @@
+"""Parser for the DHMZ city forecast feed, into Home Assistant forecast lists."""
+from collections import Counter, defaultdict
+from datetime import datetime
+import logging
+import math
+from xml.etree.ElementTree import XMLPullParser
+
+from .geo import StationIndex
+from .parser import FEED_TIME_ZONE, iter_chunks
+from .table import WIND_BEARINGS, to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+# Layout of the 3-day forecast feed: one <grad ime lat lon> per place, with
+# one <dan datum sat> element per forecast hour. benchmarks/fixtures/
+# prognoza_3d.xml is written to this layout rather than captured from the
+# feed, so benchmarks/run.py checks the parse, not the layout itself.
+LOCATION_TAG = "grad"
+ENTRY_TAG = "dan"
+SYMBOL_TAG = "simbol"
+TEMPERATURE_TAG = "t_2m"
+PRECIPITATION_TAG = "oborina"
+WIND_TAG = "vjetar"
+
+# Whether a feed without any <grad> has been reported; the layout above is
+# not confirmed against a live capture, so a mismatch must not go unnoticed.
+_layout_warned = False
+
+# A place further than this from a station is not its forecast: Europe-feed
+# stations and virtual stations outside Croatia get none.
+MAX_PLACE_DISTANCE_KM = 40.0
+
+# DHMZ pictogram number -> HA condition; a trailing "n" marks the night
+# variant. Unknown pictograms are counted in ForecastTable.unmapped.
+SYMBOL_CONDITIONS = {
+    "1": "sunny",
+    "2": "partlycloudy",
+    "3": "partlycloudy",
+    "4": "cloudy",
+    "5": "cloudy",
+    "6": "fog",
+    "7": "rainy",
+    "8": "rainy",
+    "9": "pouring",
+    "10": "snowy-rainy",
+    "11": "snowy",
+    "12": "snowy",
+    "13": "lightning-rainy",
+    "14": "lightning-rainy",
+    "15": "hail",
+}
+
+
+class ForecastTable:
+    """Hourly and daily forecasts of every place in one fetch of the feed.
+
+    Lists are built once in the parse and served as they are to every
+    weather entity whose station is nearest to the place.
+    """
+
+    __slots__ = ("index", "hourly", "daily", "unmapped")
+
+    def __init__(self, index, hourly, daily, unmapped):
+        """Initialize."""
+        self.index = index
+        self.hourly = hourly
+        self.daily = daily
+        self.unmapped = unmapped
+
+    def nearest(self, latitude: float, longitude: float):
+        """Return the forecast place nearest to a point, or None if none is close."""
+        nearest = self.index.nearest(latitude, longitude)
+        if not nearest or nearest[0][1] > MAX_PLACE_DISTANCE_KM:
+            return None
+        return nearest[0][0]
+
+
+def parse_forecast(body: bytes) -> ForecastTable:
+    """Parse a whole downloaded forecast feed; blocking, meant for an executor."""
+    names, latitudes, longitudes = [], [], []
+    hourly = {}
+    unmapped = Counter()
+    place = entry = root = None
+    for event, elem in _iter_events(body):
+        if event == "start":
+            if root is None:
+                root = elem.tag
+            if elem.tag == LOCATION_TAG:
+                place = []
+            elif elem.tag == ENTRY_TAG and place is not None:
+                entry = {}
+            continue
+
+        if elem.tag == ENTRY_TAG and entry is not None:
+            forecast = _hourly_forecast(elem.attrib, entry, unmapped)
+            if forecast is not None:
+                place.append(forecast)
+            entry = None
+        elif entry is not None:
+            entry[elem.tag] = (elem.text or "").strip()
+        elif elem.tag == LOCATION_TAG and place is not None:
+            name = elem.get("ime", "").strip()
+            if name:
+                names.append(name)
+                latitudes.append(to_float(elem.get("lat")))
+                longitudes.append(to_float(elem.get("lon")))
+                hourly[name] = sorted(place, key=lambda forecast: forecast["datetime"])
+            place = None
+            elem.clear()
+
+    if not names:
+        _warn_layout(root)
+
+    daily = {name: _daily_forecasts(forecasts) for name, forecasts in hourly.items()}
+    return ForecastTable(StationIndex(names, latitudes, longitudes), hourly, daily, unmapped)
+
+
+def _warn_layout(root) -> None:
+    """Warn, once per run, that a forecast feed held no place we could read."""
+    global _layout_warned
+    if _layout_warned:
+        return
+    _layout_warned = True
+    _LOGGER.warning(
+        "No <%s> forecast places found in the forecast feed (root element <%s>); "
+        "its layout may have changed, weather entities will have no forecast",
+        LOCATION_TAG,
+        root,
+    )
+
+
+def _iter_events(body: bytes):
+    """Yield the parse events of a document fed in chunks.
+
+    Each place is cleared as soon as it ends, so the tree never holds more
+    than one place's forecast.
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    for chunk in iter_chunks(body):
+        parser.feed(chunk)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _hourly_forecast(attributes: dict, values: dict, unmapped: Counter):
+    """Return the HA forecast of one <dan> element, or None without a valid time."""
+    date = attributes.get("datum", "").strip().rstrip(".")
+    hour = attributes.get("sat", "").strip()
+    try:
+        local = datetime.strptime(f"{date} {hour}", "%d.%m.%Y %H")
+    except ValueError:
+        return None
+    local = local.replace(tzinfo=FEED_TIME_ZONE)
+
+    symbol = values.get(SYMBOL_TAG, "")
+    night = symbol.endswith("n")
+    condition = SYMBOL_CONDITIONS.get(symbol.removesuffix("n"))
+    if condition is None and symbol:
+        unmapped[symbol] += 1
+    if condition == "sunny" and night:
+        condition = "clear-night"
+
+    wind = values.get(WIND_TAG, "")
+    temperature = to_float(values.get(TEMPERATURE_TAG))
+    precipitation = to_float(values.get(PRECIPITATION_TAG))
+    return {
+        "datetime": local.isoformat(),
+        "condition": condition,
+        "native_temperature": None if math.isnan(temperature) else temperature,
+        "native_precipitation": None if math.isnan(precipitation) else precipitation,
+        # Direction letters, then the strength, e.g. "NE2".
+        "wind_bearing": WIND_BEARINGS.get(wind.rstrip("0123456789")),
+    }
+
+
+def _daily_forecasts(hourly: list) -> list:
+    """Aggregate hourly forecasts into one forecast per local day."""
+    days = defaultdict(list)
+    for forecast in hourly:
+        days[forecast["datetime"][:10]].append(forecast)
+
+    daily = []
+    for day, forecasts in days.items():
+        temperatures = [f["native_temperature"] for f in forecasts if f["native_temperature"] is not None]
+        precipitation = [f["native_precipitation"] for f in forecasts if f["native_precipitation"] is not None]
+        conditions = Counter(
+            f["condition"].replace("clear-night", "sunny") for f in forecasts if f["condition"]
+        )
+        start = datetime.fromisoformat(day).replace(tzinfo=FEED_TIME_ZONE)
+        daily.append({
+            "datetime": start.isoformat(),
+            "condition": conditions.most_common(1)[0][0] if conditions else None,
+            "native_temperature": max(temperatures) if temperatures else None,
+            "native_templow": min(temperatures) if temperatures else None,
+            "native_precipitation": round(sum(precipitation), 1) if precipitation else None,
+        })
+    return daily
@@ -0,0 +1,115 @@
+"""Spatial index of station coordinates."""
+from array import array
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    """Return the point on the unit sphere at a latitude/longitude."""
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(chord: float) -> float:
+    """Return the great-circle distance in km of a chord on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class StationIndex:
+    """k-d tree over station positions as 3D unit vectors.
+
+    Working on the unit sphere keeps distances exact across the whole
+    Europe feed (no lat/lon wrap-around or high-latitude distortion), and
+    the straight-line (chord) order of points equals their great-circle
+    order. ``names`` lists every station of the feed, including those
+    without coordinates, which are left out of the tree.
+    """
+
+    __slots__ = ("names", "_names", "_points", "_left", "_right", "_axis", "_root")
+
+    def __init__(self, names, latitudes, longitudes):
+        """Build the tree."""
+        self.names = list(names)
+        self._names = []
+        self._points = []
+        for name, lat, lon in zip(self.names, latitudes, longitudes):
+            if not (math.isnan(lat) or math.isnan(lon)):
+                self._names.append(name)
+                self._points.append(to_unit_vector(lat, lon))
+        count = len(self._points)
+        self._left = array("i", [-1]) * count
+        self._right = array("i", [-1]) * count
+        self._axis = array("b", [0]) * count
+        self._root = self._build(list(range(count)))
+
+    @classmethod
+    def from_table(cls, table) -> "StationIndex":
+        """Index every station in a StationTable's catalogue."""
+        return cls(table.catalogue, table.catalogue_lat, table.catalogue_lon)
+
+    def __len__(self) -> int:
+        """Return the number of stations with coordinates."""
+        return len(self._points)
+
+    def _build(self, indices) -> int:
+        """Build the subtree of ``indices``; returns its root, or -1."""
+        if not indices:
+            return -1
+        points = self._points
+        # Split on the axis with the largest spread.
+        spreads = [
+            max(points[i][axis] for i in indices) - min(points[i][axis] for i in indices)
+            for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        indices.sort(key=lambda i: points[i][axis])
+        middle = len(indices) // 2
+        node = indices[middle]
+        self._axis[node] = axis
+        self._left[node] = self._build(indices[:middle])
+        self._right[node] = self._build(indices[middle + 1:])
+        return node
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> list[tuple[str, float]]:
+        """Return up to ``k`` ``(name, distance in km)`` pairs, closest first."""
+        if self._root < 0 or k < 1:
+            return []
+        target = to_unit_vector(latitude, longitude)
+        points = self._points
+        # Max-heap of the best k so far, as (-squared distance, index).
+        best = []
+        # Subtrees to visit, with a lower bound of their squared distance.
+        stack = [(self._root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if node < 0 or (len(best) == k and bound >= -best[0][0]):
+                continue
+            point = points[node]
+            dist2 = (
+                (point[0] - target[0]) ** 2
+                + (point[1] - target[1]) ** 2
+                + (point[2] - target[2]) ** 2
+            )
+            if len(best) < k:
+                heapq.heappush(best, (-dist2, node))
+            elif dist2 < -best[0][0]:
+                heapq.heapreplace(best, (-dist2, node))
+
+            axis = self._axis[node]
+            delta = target[axis] - point[axis]
+            near, far = (
+                (self._left[node], self._right[node])
+                if delta < 0
+                else (self._right[node], self._left[node])
+            )
+            # Near side last, so it is explored first.
+            stack.append((far, max(bound, delta * delta)))
+            stack.append((near, bound))
+
+        return [
+            (self._names[node], chord_to_km(math.sqrt(-neg_dist2)))
+            for neg_dist2, node in sorted(best, reverse=True)
+        ]
@@ -0,0 +1,197 @@
+"""Rolling in-memory observation history of the stations in a feed."""
+from array import array
+from datetime import datetime, timedelta
+import math
+
+# Hourly observations, so two days per station.
+HISTORY_SIZE = 48
+HISTORY_FIELDS = ("Temp", "Vlaga", "Tlak", "VjetarBrzina")
+
+# Window of the min/max/mean attributes.
+STATS_WINDOW = timedelta(hours=24)
+# Span of trends and of the computed pressure tendency, and how far the
+# sample it compares against may be off that span.
+TREND_SPAN = timedelta(hours=3)
+TREND_TOLERANCE = timedelta(minutes=45)
+# Smallest change over TREND_SPAN that counts as rising or falling.
+TREND_THRESHOLDS = {"Temp": 0.5, "Vlaga": 3.0, "Tlak": 0.5, "VjetarBrzina": 2.0}
+
+
+class StationRing:
+    """Fixed-size ring of one station's observations, one float column per field."""
+
+    __slots__ = ("times", "values", "head", "size")
+
+    def __init__(self, capacity: int = HISTORY_SIZE):
+        """Initialize."""
+        self.times = array("d", [math.nan]) * capacity
+        self.values = {field: array("d", [math.nan]) * capacity for field in HISTORY_FIELDS}
+        self.head = 0
+        self.size = 0
+
+    @property
+    def last_time(self):
+        """Return the timestamp of the newest observation, or None."""
+        if not self.size:
+            return None
+        return self.times[(self.head - 1) % len(self.times)]
+
+    def append(self, timestamp: float, values: dict) -> None:
+        """Add an observation, overwriting the oldest once full."""
+        self.times[self.head] = timestamp
+        for field, column in self.values.items():
+            column[self.head] = values[field]
+        self.head = (self.head + 1) % len(self.times)
+        self.size = min(self.size + 1, len(self.times))
+
+    def as_dict(self) -> dict:
+        """Return the observations, oldest first, in JSON-serialisable form."""
+        capacity = len(self.times)
+        slots = [(self.head - self.size + offset) % capacity for offset in range(self.size)]
+        return {
+            "times": [self.times[slot] for slot in slots],
+            **{
+                field: [None if math.isnan(column[slot]) else column[slot] for slot in slots]
+                for field, column in self.values.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, capacity: int = HISTORY_SIZE) -> "StationRing":
+        """Rebuild a ring from ``as_dict`` output, keeping the newest ``capacity``."""
+        ring = cls(capacity)
+        times = data["times"]
+        columns = {field: data.get(field) or [None] * len(times) for field in HISTORY_FIELDS}
+        for row in range(max(0, len(times) - capacity), len(times)):
+            ring.append(
+                times[row],
+                {
+                    field: math.nan if column[row] is None else column[row]
+                    for field, column in columns.items()
+                },
+            )
+        return ring
+
+    def samples(self, field: str, since: float = -math.inf):
+        """Yield ``(timestamp, value)`` from newest to oldest, skipping gaps."""
+        capacity = len(self.times)
+        column = self.values[field]
+        for offset in range(1, self.size + 1):
+            slot = (self.head - offset) % capacity
+            timestamp = self.times[slot]
+            if timestamp < since:
+                return
+            value = column[slot]
+            if not math.isnan(value):
+                yield timestamp, value
+
+
+class ObservationHistory:
+    """Ring buffers of the recent observations of every tracked station."""
+
+    def __init__(self, capacity: int = HISTORY_SIZE):
+        """Initialize."""
+        self._capacity = capacity
+        self._rings = {}
+
+    def __len__(self) -> int:
+        """Return the number of stations with history."""
+        return len(self._rings)
+
+    def as_dict(self) -> dict:
+        """Return every station's ring in JSON-serialisable form."""
+        return {name: ring.as_dict() for name, ring in self._rings.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict, capacity: int = HISTORY_SIZE) -> "ObservationHistory":
+        """Rebuild the history persisted by ``as_dict``."""
+        history = cls(capacity)
+        history._rings = {
+            name: StationRing.from_dict(ring, capacity) for name, ring in data.items()
+        }
+        return history
+
+    def record(self, table, when: datetime) -> None:
+        """Add the observations of a StationTable made at ``when``.
+
+        Stations already holding an observation that recent are skipped, so
+        re-parsing the same publication does not add duplicates. Stations
+        missing from the table are kept, as it may only hold the stations
+        subscribed so far, until their newest observation leaves the window.
+        """
+        timestamp = when.timestamp()
+        expired = timestamp - STATS_WINDOW.total_seconds()
+        for name in [
+            name
+            for name, ring in self._rings.items()
+            if ring.last_time is None or ring.last_time < expired
+        ]:
+            del self._rings[name]
+        columns = {field: table.numeric[field] for field in HISTORY_FIELDS}
+        for row, name in enumerate(table.names):
+            ring = self._rings.get(name)
+            if ring is None:
+                ring = self._rings[name] = StationRing(self._capacity)
+            elif ring.last_time is not None and ring.last_time >= timestamp:
+                continue
+            ring.append(timestamp, {field: column[row] for field, column in columns.items()})
+
+    def samples(self, name: str, field: str, since: float = -math.inf) -> list:
+        """Return a station's ``(timestamp, value)`` samples since a time, oldest first."""
+        ring = self._rings.get(name)
+        if ring is None:
+            return []
+        return list(ring.samples(field, since))[::-1]
+
+    def change(self, name: str, field: str, span: timedelta = TREND_SPAN):
+        """Return how much a field changed over ``span``, or None."""
+        ring = self._rings.get(name)
+        if ring is None or ring.last_time is None:
+            return None
+        samples = ring.samples(field, ring.last_time - (span + TREND_TOLERANCE).total_seconds())
+        latest = next(samples, None)
+        if latest is None or latest[0] != ring.last_time:
+            return None
+        target = latest[0] - span.total_seconds()
+        tolerance = TREND_TOLERANCE.total_seconds()
+        earlier = [sample for sample in samples if abs(sample[0] - target) <= tolerance]
+        if not earlier:
+            return None
+        _, value = min(earlier, key=lambda sample: abs(sample[0] - target))
+        return latest[1] - value
+
+    def fill_pressure_tendency(self, table) -> None:
+        """Compute the pressure tendency of stations the feed left without one."""
+        column = table.numeric["TlakTend"]
+        for row, value in enumerate(column):
+            if math.isnan(value):
+                change = self.change(table.names[row], "Tlak")
+                if change is not None:
+                    column[row] = round(change, 1)
+
+    def attributes(self, name: str, field: str) -> dict:
+        """Return rolling min/max/mean and the trend of a station's field."""
+        ring = self._rings.get(name)
+        if ring is None or ring.last_time is None:
+            return {}
+        values = [
+            value
+            for _, value in ring.samples(field, ring.last_time - STATS_WINDOW.total_seconds())
+        ]
+        if not values:
+            return {}
+        attributes = {
+            "min_24h": min(values),
+            "max_24h": max(values),
+            "mean_24h": round(sum(values) / len(values), 1),
+        }
+        change = self.change(name, field)
+        if change is not None:
+            threshold = TREND_THRESHOLDS[field]
+            if change >= threshold:
+                attributes["trend"] = "rising"
+            elif change <= -threshold:
+                attributes["trend"] = "falling"
+            else:
+                attributes["trend"] = "steady"
+        return attributes
@@ -0,0 +1,90 @@
+"""Inverse-distance interpolation of station observations at arbitrary points."""
+import math
+
+from .derived import apparent_temperature, dew_point, heat_index, wind_chill
+
+IDW_POWER = 2
+# Stations a virtual station is interpolated from unless configured; const
+# re-exports it for the config flow.
+DEFAULT_NEIGHBOURS = 4
+# A point this close to a station takes that station's values as they are.
+EXACT_DISTANCE_KM = 0.1
+
+# Data key -> feed field of the interpolated quantities.
+INTERPOLATED_FIELDS = {
+    "temperature": "Temp",
+    "humidity": "Vlaga",
+    "pressure": "Tlak",
+    "pressure_tendency": "TlakTend",
+    "wind_speed": "VjetarBrzina",
+}
+
+
+def idw_weights(index, latitude: float, longitude: float, k: int = DEFAULT_NEIGHBOURS):
+    """Return ``((station, weight), ...)`` of the k nearest stations, closest first."""
+    nearest = index.nearest(latitude, longitude, k)
+    if not nearest:
+        return ()
+    if nearest[0][1] < EXACT_DISTANCE_KM:
+        return ((nearest[0][0], 1.0),)
+    weights = [(name, distance**-IDW_POWER) for name, distance in nearest]
+    total = sum(weight for _, weight in weights)
+    return tuple((name, weight / total) for name, weight in weights)
+
+
+def interpolate(table, points: dict) -> dict:
+    """Interpolate every point of ``points`` (key -> idw_weights) in one batch.
+
+    Each field column is walked once for all points. Neighbours missing a
+    value are left out and the remaining weights renormalized. Wind
+    direction and the condition cannot be averaged and come from the
+    nearest station that has them. Returns key -> data dict.
+    """
+    rows = {
+        key: [(table.index[name], weight) for name, weight in weights if name in table.index]
+        for key, weights in points.items()
+    }
+    results = {key: {} for key in points}
+
+    for data_key, field in INTERPOLATED_FIELDS.items():
+        column = table.numeric[field]
+        for key, neighbours in rows.items():
+            value = total = 0.0
+            for row, weight in neighbours:
+                sample = column[row]
+                if not math.isnan(sample):
+                    value += weight * sample
+                    total += weight
+            results[key][data_key] = round(value / total, 1) if total else None
+
+    wind_codes = table.coded["VjetarSmjer"]
+    for key, neighbours in rows.items():
+        result = results[key]
+        if result["humidity"] is not None:
+            result["humidity"] = int(round(result["humidity"]))
+        result["wind_direction"] = next(
+            (table.vocabulary[wind_codes[row]] for row, _ in neighbours if wind_codes[row]),
+            None,
+        )
+        conditions = table.conditions
+        result["condition"] = None if conditions is None else next(
+            (conditions[row] for row, _ in neighbours if conditions[row]), None
+        )
+        _add_derived(result)
+    return results
+
+
+def _add_derived(result: dict) -> None:
+    """Add the derived quantities of an interpolated point."""
+    temp = result["temperature"]
+    humidity = result["humidity"]
+    wind = result["wind_speed"]
+    quantities = {
+        "dew_point": (dew_point, (temp, humidity)),
+        "apparent_temperature": (apparent_temperature, (temp, humidity, wind)),
+        "wind_chill": (wind_chill, (temp, wind)),
+        "heat_index": (heat_index, (temp, humidity)),
+    }
+    for key, (function, args) in quantities.items():
+        value = math.nan if None in args else function(*args)
+        result[key] = None if math.isnan(value) else round(value, 1)
@@ -0,0 +1,125 @@
+"""Rolling performance metrics of a feed hub."""
+import asyncio
+from collections import Counter, deque
+
+HISTOGRAM_SIZE = 100
+
+# Poll phases timed by the hub. "request" covers DNS, connect, TLS and the
+# server until response headers; "download" is the body transfer; "parse"
+# is measured in the executor worker; "dispatch" is the fan-out to city
+# coordinators and their entities. "loop_lag" is not a phase but the
+# worst delay of event loop callbacks while the poll ran.
+PHASES = ("request", "download", "parse", "dispatch", "total", "loop_lag")
+
+# How often the loop lag probe checks in while a poll runs, in seconds.
+PROBE_INTERVAL = 0.01
+
+
+class RollingHistogram:
+    """Keep the most recent samples of a measurement and summarize them."""
+
+    def __init__(self, size: int = HISTOGRAM_SIZE):
+        """Initialize."""
+        self._samples = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self._samples.append(value)
+
+    def summary(self) -> dict:
+        """Return count, last, min, median, 90th percentile and max."""
+        if not self._samples:
+            return {"count": 0}
+        ordered = sorted(self._samples)
+        return {
+            "count": len(ordered),
+            "last": self._samples[-1],
+            "min": ordered[0],
+            "p50": ordered[len(ordered) // 2],
+            "p90": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+            "max": ordered[-1],
+        }
+
+    @property
+    def last(self):
+        """Return the most recent sample, or None."""
+        return self._samples[-1] if self._samples else None
+
+
+class FeedMetrics:
+    """Per-phase timings, transfer sizes and cache outcomes of a feed hub."""
+
+    def __init__(self):
+        """Initialize."""
+        self.timings = {phase: RollingHistogram() for phase in PHASES}
+        # Document size as parsed, and as transferred before decompression.
+        self.bytes = RollingHistogram()
+        self.transfer_bytes = RollingHistogram()
+        # Net memory blocks allocated by the parse, counted in its worker.
+        self.parse_blocks = RollingHistogram()
+        # polls, not_modified, unchanged, changed, failed
+        self.counters = Counter()
+        self._listeners = []
+
+    def record_time(self, phase: str, seconds: float) -> None:
+        """Record the duration of a poll phase."""
+        self.timings[phase].add(round(seconds * 1000, 3))
+
+    @property
+    def cache_hit_ratio(self):
+        """Return the share of polls answered by a 304 or an unchanged body."""
+        polls = self.counters["polls"]
+        if not polls:
+            return None
+        hits = self.counters["not_modified"] + self.counters["unchanged"]
+        return round(hits / polls * 100, 1)
+
+    def add_listener(self, listener):
+        """Call ``listener`` after each poll; returns a callback removing it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def notify(self) -> None:
+        """Tell listeners a poll was recorded."""
+        for listener in list(self._listeners):
+            listener()
+
+    def as_dict(self) -> dict:
+        """Return all metrics for diagnostics."""
+        return {
+            "counters": dict(self.counters),
+            "cache_hit_ratio": self.cache_hit_ratio,
+            "timings_ms": {phase: h.summary() for phase, h in self.timings.items()},
+            "bytes": self.bytes.summary(),
+            "transfer_bytes": self.transfer_bytes.summary(),
+            "parse_blocks": self.parse_blocks.summary(),
+        }
+
+
+class LoopLagProbe:
+    """Track how late the event loop runs a callback while it is started.
+
+    A callback is rescheduled every PROBE_INTERVAL; anything blocking the
+    loop, such as parsing on it, shows up as the callback running late.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        """Initialize and start probing."""
+        self._loop = loop
+        self.max_lag = 0.0
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Schedule the next check."""
+        self._expected = self._loop.time() + PROBE_INTERVAL
+        self._handle = self._loop.call_at(self._expected, self._tick)
+
+    def _tick(self) -> None:
+        """Record how late this check ran and schedule the next one."""
+        self.max_lag = max(self.max_lag, self._loop.time() - self._expected)
+        self._schedule()
+
+    def stop(self) -> float:
+        """Stop probing and return the worst lag seen, in seconds."""
+        self._handle.cancel()
+        return self.max_lag
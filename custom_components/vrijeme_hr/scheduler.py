@@ -0,0 +1,157 @@
+"""Poll scheduling for the DHMZ feeds: publication-aware timing and failure backoff."""
+from collections import deque
+from datetime import timedelta
+import random
+from statistics import median
+
+DEFAULT_CADENCE = timedelta(hours=1)
+MIN_CADENCE = timedelta(minutes=10)
+MAX_CADENCE = timedelta(hours=6)
+# Poll this long after the expected publication, to absorb jitter.
+PUBLISH_MARGIN = timedelta(seconds=30)
+# Retry interval while an expected publication has not shown up yet.
+CATCH_UP_INTERVAL = timedelta(minutes=2)
+MIN_INTERVAL = timedelta(seconds=60)
+HISTORY_SIZE = 24
+
+
+class PublicationScheduler:
+    """Learn when a feed publishes new observations and time polls after it.
+
+    Cadence is learned from successive observation timestamps in the feed.
+    Publication lag (how long after the observation time the data shows up)
+    is learned from the fetches that actually returned new content. The
+    next poll is aimed just after the expected publication, with short
+    catch-up retries when the data is late.
+    """
+
+    def __init__(self):
+        """Initialize."""
+        self._published = deque(maxlen=HISTORY_SIZE)
+        self._lags = deque(maxlen=HISTORY_SIZE)
+
+    @property
+    def cadence(self) -> timedelta:
+        """Return the learned interval between publications."""
+        steps = [
+            later - earlier
+            for earlier, later in zip(self._published, list(self._published)[1:])
+            if later > earlier
+        ]
+        if not steps:
+            return DEFAULT_CADENCE
+        return min(max(median(steps), MIN_CADENCE), MAX_CADENCE)
+
+    @property
+    def lag(self) -> timedelta:
+        """Return the publication lag to aim for.
+
+        Lags are only ever measured from above, so aim one catch-up interval
+        before the shortest one seen; otherwise the estimate could never
+        move closer to the real lag.
+        """
+        if not self._lags:
+            return timedelta(0)
+        return max(min(self._lags) - CATCH_UP_INTERVAL, timedelta(0))
+
+    def as_dict(self) -> dict:
+        """Return the learned timing for diagnostics."""
+        return {
+            "cadence": self.cadence.total_seconds(),
+            "lag": self.lag.total_seconds(),
+            "publications": len(self._published),
+        }
+
+    def record(self, now, changed: bool, observed=None) -> None:
+        """Record the outcome of a fetch made at ``now``.
+
+        ``observed`` is the observation time carried in the feed; when the
+        feed has none, the fetch time of new content stands in for it.
+        """
+        if not changed:
+            return
+        published = observed or now
+        if self._published and published <= self._published[-1]:
+            return
+        if self._published:
+            # New content appeared some time after the previous publication;
+            # the time we saw it bounds the publication lag from above.
+            self._lags.append(max(now - published, timedelta(0)))
+        self._published.append(published)
+
+    def next_interval(self, now, max_interval: timedelta) -> timedelta:
+        """Return how long to wait before the next poll."""
+        if not self._published:
+            return max_interval
+        expected = self._published[-1] + self.cadence + self.lag + PUBLISH_MARGIN
+        if expected > now:
+            interval = expected - now
+        elif now - expected < self.cadence / 2:
+            interval = CATCH_UP_INTERVAL
+        else:
+            # Well overdue, the feed may have skipped a slot.
+            interval = self.cadence / 4
+        return min(max(interval, MIN_INTERVAL), max_interval)
+
+
+# Retries after a failed poll back off exponentially from RETRY_BASE up to
+# RETRY_MAX. After BREAKER_THRESHOLD failures in a row the breaker opens and
+# only one trial poll is made every BREAKER_COOLDOWN.
+RETRY_BASE = timedelta(minutes=1)
+RETRY_MAX = timedelta(minutes=15)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = timedelta(minutes=30)
+
+
+class CircuitBreaker:
+    """Space out retries of a failing feed and stop them during outages.
+
+    Delays carry random jitter of up to half their length, so integrations
+    that failed together do not retry in lockstep.
+    """
+
+    def __init__(self, rng=random):
+        """Initialize."""
+        self._rng = rng
+        self.failures = 0
+        self.retry_at = None
+
+    @property
+    def open(self) -> bool:
+        """Return whether the failure threshold was reached."""
+        return self.failures >= BREAKER_THRESHOLD
+
+    def allow_request(self, now) -> bool:
+        """Return whether a poll at ``now`` may go to the network.
+
+        Once open, only a trial poll after the cooldown (half-open) does.
+        """
+        return not self.open or now >= self.retry_at
+
+    def as_dict(self) -> dict:
+        """Return the breaker state for diagnostics."""
+        return {
+            "failures": self.failures,
+            "open": self.open,
+            "retry_at": self.retry_at and self.retry_at.isoformat(),
+        }
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful poll."""
+        self.failures = 0
+        self.retry_at = None
+
+    def record_failure(self, now) -> None:
+        """Count a failed poll and schedule the next attempt."""
+        self.failures += 1
+        if self.open:
+            delay = BREAKER_COOLDOWN
+        else:
+            delay = min(RETRY_BASE * 2 ** (self.failures - 1), RETRY_MAX)
+        self.retry_at = now + delay * (1 - self._rng.random() / 2)
+
+    def next_interval(self, now):
+        """Return how long to wait before retrying, or None when not failing."""
+        if self.retry_at is None:
+            return None
+        return max(self.retry_at - now, MIN_INTERVAL)
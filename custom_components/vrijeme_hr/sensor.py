@@ -1,53 +1,58 @@
 """Support for Vrijeme HR sensors."""
 import logging
-from typing import Any, Optional
 
-from homeassistant.components.sensor import (
-    SensorEntity,
-    SensorDeviceClass,
-    SensorStateClass,
-)
-from homeassistant.const import (
-    UnitOfTemperature,
-    PERCENTAGE,
-    UnitOfPressure,
-    UnitOfSpeed,
-)
-from homeassistant.core import HomeAssistant
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN, SensorEntity
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
     SENSOR_TYPES,
+    DIAGNOSTIC_SENSOR_TYPES,
+    CONF_ALL_STATIONS,
+    CONF_COUNTRY,
     CONF_INTEGRATION_TYPE,
     CONF_SENSOR_OPTIONS,  # Changed from CONF_SENSORS to CONF_SENSOR_OPTIONS
+    CONF_STATISTICS,
+    DEFAULT_COUNTRY,
+    get_feed_keys,
+    get_station_id,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Diagnostic sensor type -> value read from the hub's FeedMetrics
+DIAGNOSTIC_VALUES = {
+    "fetch_duration": lambda metrics: metrics.timings["total"].last,
+    "parse_duration": lambda metrics: metrics.timings["parse"].last,
+    "download_size": lambda metrics: metrics.bytes.last,
+    "loop_lag": lambda metrics: metrics.timings["loop_lag"].last,
+    "cache_hit_ratio": lambda metrics: metrics.cache_hit_ratio,
+}
+
+# Observation attribute a sensor shows, where it differs from its type
+OBSERVATION_ATTRIBUTES = {"wind_direction": "wind_bearing"}
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up the Vrijeme HR sensor."""
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
     
     try:
-        # Determine which sensors to create based on integration type
-        if entry.data[CONF_INTEGRATION_TYPE] == "both":
-            # If "both", only create selected sensors
-            selected_sensors = entry.data.get(CONF_SENSOR_OPTIONS, [])
-            available_sensors = {k: v for k, v in SENSOR_TYPES.items() if k in selected_sensors}
+        if entry.data.get(CONF_ALL_STATIONS):
+            entities = async_station_sensors(hass, entry, coordinator)
         else:
-            # If "sensor", create all sensors
-            available_sensors = SENSOR_TYPES
-
-        entities = []
-        for sensor_type, sensor_info in available_sensors.items():
+            entities = _city_sensors(entry, coordinator)
+        for sensor_type, sensor_info in DIAGNOSTIC_SENSOR_TYPES.items():
             entities.append(
-                VrijemeHrvatskaSensor(
-                    coordinator,
+                VrijemeHrvatskaDiagnosticSensor(
+                    coordinator.hub,
                     sensor_type,
                     sensor_info,
-                    entry.data["city"]
+                    entry.data["city"],
+                    get_station_id(entry.data),
                 )
             )
         
@@ -61,89 +66,202 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         _LOGGER.error("Error setting up Vrijeme HR sensors: %s", err, exc_info=True)
         raise
 
+
+def _sensor_types(entry: ConfigEntry):
+    """Return the sensor types of an entry.
+
+    With the statistics option the observations are imported as external
+    statistics, so sensors drop their state class and the recorder does not
+    compile a second set from their states.
+    """
+    if not {**entry.data, **entry.options}.get(CONF_STATISTICS):
+        return SENSOR_TYPES
+    return {key: {**info, "state_class": None} for key, info in SENSOR_TYPES.items()}
+
+
+def _city_sensors(entry: ConfigEntry, coordinator) -> list:
+    """Return the sensors of a single-city entry."""
+    sensor_types = _sensor_types(entry)
+    # Determine which sensors to create based on integration type
+    if entry.data[CONF_INTEGRATION_TYPE] == "both":
+        # If "both", only create selected sensors
+        selected_sensors = entry.data.get(CONF_SENSOR_OPTIONS, [])
+        available_sensors = {k: v for k, v in sensor_types.items() if k in selected_sensors}
+    else:
+        # If "sensor", create all sensors the feed provides
+        feed_keys = get_feed_keys(entry.data.get(CONF_COUNTRY, DEFAULT_COUNTRY))
+        available_sensors = {k: v for k, v in sensor_types.items() if k in feed_keys}
+    selected = entry.data[CONF_INTEGRATION_TYPE] == "both"
+
+    return [
+        VrijemeHrvatskaSensor(
+            coordinator,
+            sensor_type,
+            sensor_info,
+            entry.data["city"],
+            get_station_id(entry.data),
+            enabled_default=selected or sensor_info.get("enabled_default", True),
+        )
+        for sensor_type, sensor_info in available_sensors.items()
+    ]
+
+
+@callback
+def async_station_sensors(hass: HomeAssistant, entry: ConfigEntry, coordinator) -> list:
+    """Return the enabled sensors of an all-stations entry.
+
+    Every station and field gets a registry entry, disabled until the user
+    enables it, but entity objects are only created for the enabled ones;
+    enabling one reloads the entry. Tells the coordinator which stations
+    and fields to parse, refreshing if the current table lacks some.
+    """
+    registry = er.async_get(hass)
+    feed_keys = get_feed_keys(entry.data.get(CONF_COUNTRY, DEFAULT_COUNTRY))
+    sensor_types = {k: v for k, v in _sensor_types(entry).items() if k in feed_keys}
+    entry_id = get_station_id(entry.data)
+
+    enabled = []
+    for city in coordinator.stations:
+        station_id = f"{entry_id}_{city}"
+        for sensor_type, sensor_info in sensor_types.items():
+            unique_id = f"vrijeme_hr_{station_id}_{sensor_type}"
+            entity_id = registry.async_get_entity_id(SENSOR_DOMAIN, DOMAIN, unique_id)
+            if entity_id is None:
+                registry.async_get_or_create(
+                    SENSOR_DOMAIN,
+                    DOMAIN,
+                    unique_id,
+                    config_entry=entry,
+                    disabled_by=er.RegistryEntryDisabler.INTEGRATION,
+                    suggested_object_id=f"{city} {sensor_info['name']}",
+                    original_name=f"{city} {sensor_info['name']}",
+                    original_icon=sensor_info["icon"],
+                    original_device_class=sensor_info["device_class"],
+                    unit_of_measurement=sensor_info["unit"],
+                )
+            elif not registry.async_get(entity_id).disabled:
+                enabled.append(
+                    VrijemeHrvatskaStationSensor(
+                        coordinator, sensor_type, sensor_info, city, station_id
+                    )
+                )
+
+    if coordinator.async_set_enabled((sensor.station, sensor.sensor_type) for sensor in enabled):
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_refresh_{entry.data['city']}"
+        )
+    return enabled
+
 class VrijemeHrvatskaSensor(CoordinatorEntity, SensorEntity):
     """Representation of a Vrijeme HR sensor."""
 
-    def __init__(self, coordinator, sensor_type, sensor_info, city):
+    def __init__(
+        self, coordinator, sensor_type, sensor_info, city, station_id, enabled_default=True
+    ):
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        # Only wake this sensor when its own value changed.
+        super().__init__(coordinator, context=sensor_type)
         self._sensor_type = sensor_type
+        self._attribute = OBSERVATION_ATTRIBUTES.get(sensor_type, sensor_type)
         self._sensor_info = sensor_info
         self._city = city
-        self._attr_unique_id = f"vrijeme_hr_{city}_{sensor_type}"
+        self._attr_unique_id = f"vrijeme_hr_{station_id}_{sensor_type}"
         self._attr_name = f"{city} {sensor_info['name']}"
         self._attr_native_unit_of_measurement = sensor_info["unit"]
         self._attr_device_class = sensor_info["device_class"]
         self._attr_state_class = sensor_info["state_class"]
         self._attr_icon = sensor_info["icon"]
+        self._attr_entity_registry_enabled_default = enabled_default
 
         # Add attribution
         self._attr_attribution = "Data provided by DHMZ (Croatian Meteorological and Hydrological Service)"
         
         # Add device info
         self._attr_device_info = {
-            "identifiers": {(DOMAIN, city)},
+            "identifiers": {(DOMAIN, station_id)},
             "name": f"Vrijeme HR {city}",
             "manufacturer": "DHMZ",
             "model": "Weather Station",
             "configuration_url": "https://meteo.hr/",
         }
 
+    # Station read from the coordinator data; None for the coordinator's own.
+    station = None
+
+    @property
+    def sensor_type(self) -> str:
+        """Return the data key this sensor shows."""
+        return self._sensor_type
+
+    @property
+    def _data(self):
+        """Return the Observation this sensor reads from."""
+        return self.coordinator.data
+
+    @property
+    def extra_state_attributes(self):
+        """Return recent statistics and flag data not fetched live yet."""
+        attributes = {
+            **self.coordinator.history_attributes(self._sensor_type, self.station),
+            **(self.coordinator.stale_attributes or {}),
+        }
+        return attributes or None
+
     @property
     def native_value(self):
-        """Return the state of the sensor."""
-        if self.coordinator.data is None:
-            _LOGGER.debug("%s: Coordinator data is None", self._attr_name)
-            return None
-            
-        # Special handling for condition sensor - look for "vrijeme" key instead and convert it
-        if self._sensor_type == "condition":
-            vrijeme = self.coordinator.data.get("vrijeme")
-            if vrijeme is None or vrijeme == '-':
-                return None
-            from .const import get_weather_condition
-            value = get_weather_condition(vrijeme)
-        else:
-            value = self.coordinator.data.get(self._sensor_type)
-        
-        _LOGGER.debug("%s: Raw value from coordinator: %s", self._attr_name, value)
-        
-        # Return None if value is None or '-'
-        if value is None or value == '-':
-            return None
-            
-        # Special handling for different sensor types
-        if self._sensor_type == "wind_direction":
-            # Return wind direction as degrees
-            direction_map = {
-                "N": 0, "NNE": 22.5, "NE": 45, "ENE": 67.5,
-                "E": 90, "ESE": 112.5, "SE": 135, "SSE": 157.5,
-                "S": 180, "SSW": 202.5, "SW": 225, "WSW": 247.5,
-                "W": 270, "WNW": 292.5, "NW": 315, "NNW": 337.5,
-                "C": None  # Handle 'C' by returning None
-            }
-            converted_value = direction_map.get(value, None)
-            _LOGGER.debug("%s: Converted wind direction from %s to %s", 
-                        self._attr_name, value, converted_value)
-            return converted_value
-            
-        elif self._sensor_type == "pressure_tendency":
-            converted_value = self._process_pressure_trend(value)
-            _LOGGER.debug("%s: Converted pressure tendency from %s to %s", 
-                        self._attr_name, value, converted_value)
-            return converted_value
-        
-        _LOGGER.debug("%s: Returning value: %s", self._attr_name, value)    
-        return value
-
-    def _process_pressure_trend(self, value: str) -> Optional[float]:
-        """Process pressure trend value."""
-        if value is None or value == "-" or value == "":
-            return None
-        try:
-            trend = float(value)
-            # Explicitly return 0.0 if the value is zero
-            return 0.0 if trend == 0 else trend
-        except (ValueError, TypeError):
-            _LOGGER.warning("Invalid pressure trend value: %s", value)
-            return None
+        """Return the state of the sensor, converted once per poll."""
+        data = self._data
+        return None if data is None else getattr(data, self._attribute)
+
+
+class VrijemeHrvatskaStationSensor(VrijemeHrvatskaSensor):
+    """Sensor of one station of an all-stations entry."""
+
+    def __init__(self, coordinator, sensor_type, sensor_info, city, station_id):
+        """Initialize the sensor."""
+        super().__init__(coordinator, sensor_type, sensor_info, city, station_id)
+        self.station = city
+        # Only wake this sensor when its own station's value changed.
+        self.coordinator_context = (city, sensor_type)
+
+    @property
+    def _data(self):
+        """Return the station's row of the shared table."""
+        return self.coordinator.row(self.station)
+
+    @property
+    def available(self) -> bool:
+        """Return whether the station is in the latest feed."""
+        return super().available and self._data is not None
+
+
+class VrijemeHrvatskaDiagnosticSensor(SensorEntity):
+    """Performance metric of the feed hub serving a city."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = False
+
+    def __init__(self, hub, sensor_type, sensor_info, city, station_id):
+        """Initialize the sensor."""
+        self._hub = hub
+        self._value = DIAGNOSTIC_VALUES[sensor_type]
+        self._attr_unique_id = f"vrijeme_hr_{station_id}_{sensor_type}"
+        self._attr_name = f"{city} {sensor_info['name']}"
+        self._attr_native_unit_of_measurement = sensor_info["unit"]
+        self._attr_device_class = sensor_info["device_class"]
+        self._attr_state_class = sensor_info["state_class"]
+        self._attr_icon = sensor_info["icon"]
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, station_id)},
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Update whenever the hub records a poll, changed data or not."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._hub.metrics.add_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self):
+        """Return the latest value of the metric."""
+        return self._value(self._hub.metrics)
@@ -0,0 +1,189 @@
+"""Where a feed hub reads its document from: DHMZ, a local file or recordings."""
+import asyncio
+from pathlib import Path
+import time
+import zlib
+
+from aiohttp import hdrs
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import DATA_FETCH_SEMAPHORE, DOMAIN, MAX_CONCURRENT_FETCHES
+
+# Largest feed document accepted, after decompression. The Europe feed, the
+# bigger one, is a few hundred KiB.
+MAX_FEED_BYTES = 8 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+# Offered on every request. Bodies are requested with auto_decompress=False
+# and inflated by async_read_body, which can then count the bytes on the wire.
+ACCEPT_ENCODING = "gzip, deflate"
+COMPRESSED_ENCODINGS = ("gzip", "deflate")
+# zlib window bits accepting both zlib (deflate) and gzip headers
+AUTO_HEADER_WBITS = 32 + zlib.MAX_WBITS
+
+
+@callback
+def async_get_fetch_semaphore(hass: HomeAssistant) -> asyncio.Semaphore:
+    """Return the semaphore bounding concurrent downloads across all feeds."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_FETCH_SEMAPHORE not in domain_data:
+        domain_data[DATA_FETCH_SEMAPHORE] = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    return domain_data[DATA_FETCH_SEMAPHORE]
+
+
+async def async_read_body(response, limit: int = MAX_FEED_BYTES):
+    """Read a response body as raw bytes, decompressed chunk by chunk.
+
+    Returns ``(body, transferred)``: the document and the number of bytes
+    read off the wire, compressed or not. The response must come from a
+    request made with ``auto_decompress=False``.
+
+    The bytes go to the parser as they are, which decodes them with the
+    encoding the XML declares. Reading stops as soon as the body (or its
+    announced length) exceeds ``limit``, so an oversized or runaway
+    document, a compression bomb included, is never held in full.
+    """
+    if response.content_length is not None and response.content_length > limit:
+        raise ValueError(f"Feed of {response.content_length} bytes exceeds {limit}")
+    encoding = response.headers.get(hdrs.CONTENT_ENCODING, "identity").strip().lower()
+    if encoding in COMPRESSED_ENCODINGS:
+        decompressor = zlib.decompressobj(AUTO_HEADER_WBITS)
+    elif encoding == "identity":
+        decompressor = None
+    else:
+        raise ValueError(f"Unsupported Content-Encoding {encoding}")
+
+    body = bytearray()
+    transferred = 0
+    async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+        transferred += len(chunk)
+        if decompressor is not None:
+            # One byte past the limit is enough to know it was exceeded.
+            chunk = decompressor.decompress(chunk, limit - len(body) + 1)
+            if decompressor.unconsumed_tail:
+                raise ValueError(f"Feed exceeds {limit} bytes")
+        body += chunk
+        if len(body) > limit:
+            raise ValueError(f"Feed exceeds {limit} bytes")
+    if decompressor is not None:
+        body += decompressor.flush()
+        if len(body) > limit:
+            raise ValueError(f"Feed exceeds {limit} bytes")
+    return body, transferred
+
+
+def is_url(location: str) -> bool:
+    """Return whether a feed location is an HTTP(S) URL rather than a path."""
+    return location.startswith(("http://", "https://"))
+
+
+def feed_source(location: str):
+    """Return the source reading a feed from a URL, a file or a directory."""
+    if is_url(location):
+        return HttpFeedSource(location)
+    return LocalFeedSource(location)
+
+
+class HttpFeedSource:
+    """Download the feed, revalidating it with ETag and Last-Modified.
+
+    Validators are ``(etag, last_modified)``. They are handed back to the
+    caller rather than kept here, so it can store them only once the
+    document they came with has parsed: a corrupt publication must not
+    turn the next poll into a 304.
+    """
+
+    def __init__(self, url: str):
+        """Initialize."""
+        self.location = url
+
+    async def async_read(self, hass: HomeAssistant, metrics, validators=None):
+        """Return ``(document, validators)``.
+
+        The document is None if the server confirmed that the one read
+        with ``validators`` is still current.
+        """
+        headers = {hdrs.ACCEPT_ENCODING: ACCEPT_ENCODING}
+        if validators is not None:
+            etag, last_modified = validators
+            if etag:
+                headers[hdrs.IF_NONE_MATCH] = etag
+            if last_modified:
+                headers[hdrs.IF_MODIFIED_SINCE] = last_modified
+
+        session = async_get_clientsession(hass)
+        async with async_get_fetch_semaphore(hass):
+            start = time.perf_counter()
+            async with session.get(
+                self.location, headers=headers, timeout=30, auto_decompress=False
+            ) as response:
+                metrics.record_time("request", time.perf_counter() - start)
+                if response.status == 304 and validators is not None:
+                    return None, validators
+                if response.status != 200:
+                    raise ValueError(f"HTTP {response.status}")
+
+                start = time.perf_counter()
+                body, transferred = await async_read_body(response)
+                metrics.record_time("download", time.perf_counter() - start)
+                metrics.transfer_bytes.add(transferred)
+
+                validators = (
+                    response.headers.get(hdrs.ETAG),
+                    response.headers.get(hdrs.LAST_MODIFIED),
+                )
+        return body, validators
+
+    def as_dict(self) -> dict:
+        """Return the source state for diagnostics."""
+        return {"url": self.location}
+
+
+class LocalFeedSource:
+    """Read the feed from a local file, or replay a directory of recordings.
+
+    A directory's ``*.xml`` files are served one per poll in name order,
+    looping back to the first, so recorded feeds (broken ones included) can
+    be replayed offline at any poll rate. A single file counts as not
+    modified while its modification time, its validator, is unchanged.
+    """
+
+    def __init__(self, path: str):
+        """Initialize."""
+        self.location = path
+        self.replayed = 0
+
+    async def async_read(self, hass: HomeAssistant, metrics, validators=None):
+        """Return ``(document, validators)``; the document is None if unchanged."""
+        start = time.perf_counter()
+        result = await hass.async_add_executor_job(self._read, validators)
+        metrics.record_time("download", time.perf_counter() - start)
+        return result
+
+    def _read(self, validators):
+        """Read the next document; blocking."""
+        path = Path(self.location)
+        if path.is_dir():
+            recordings = sorted(path.glob("*.xml"))
+            if not recordings:
+                raise FileNotFoundError(f"No *.xml recordings in {path}")
+            path = recordings[self.replayed % len(recordings)]
+            self.replayed += 1
+            return self._read_file(path), None
+
+        mtime = path.stat().st_mtime_ns
+        if validators is not None and mtime == validators:
+            return None, validators
+        return self._read_file(path), mtime
+
+    @staticmethod
+    def _read_file(path: Path) -> bytes:
+        """Read a document, refusing one larger than MAX_FEED_BYTES."""
+        size = path.stat().st_size
+        if size > MAX_FEED_BYTES:
+            raise ValueError(f"Feed of {size} bytes exceeds {MAX_FEED_BYTES}")
+        return path.read_bytes()
+
+    def as_dict(self) -> dict:
+        """Return the source state for diagnostics."""
+        return {"path": self.location, "replayed": self.replayed}
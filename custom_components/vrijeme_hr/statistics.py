@@ -0,0 +1,114 @@
+"""Bulk import of hourly observations into long-term statistics."""
+from datetime import datetime, timezone
+import logging
+import math
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.components.sensor import SensorStateClass
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import slugify
+
+from .const import AVAILABLE_SENSORS, DOMAIN, FEED_FIELDS, SENSOR_TYPES
+from .history import HISTORY_FIELDS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Data keys imported as statistics: the ones whose sensors are measurements.
+STATISTIC_KEYS = frozenset(
+    key for key, info in SENSOR_TYPES.items()
+    if info["state_class"] == SensorStateClass.MEASUREMENT
+)
+HOUR = 3600
+
+
+def hourly_statistics(samples) -> list:
+    """Aggregate ``(timestamp, value)`` samples, oldest first, into hourly rows."""
+    hours = {}
+    for timestamp, value in samples:
+        hours.setdefault(timestamp - timestamp % HOUR, []).append(value)
+    return [
+        StatisticData(
+            start=datetime.fromtimestamp(start, timezone.utc),
+            mean=round(math.fsum(values) / len(values), 2),
+            min=min(values),
+            max=max(values),
+        )
+        for start, values in hours.items()
+    ]
+
+
+class StatisticsWriter:
+    """Import an entry's observations as external statistics, once per publication.
+
+    Each poll that brings a new publication queues one batch per statistic
+    to the recorder. Fields kept in the hub's observation history are
+    aggregated from it, so the first import after startup backfills the
+    last two days and a missed hour is filled in on the next one; other
+    keys take their current value. Hours already imported are overwritten,
+    so re-importing is harmless.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, station_id: str, per_station: bool):
+        """Initialize.
+
+        With ``per_station`` (all-stations entries), each station gets its
+        own statistics under ``<station_id>_<station>``.
+        """
+        self.hass = hass
+        self.coordinator = coordinator
+        self._station_id = station_id
+        self._per_station = per_station
+        self._observed_at = None
+        # Statistic id -> start of the newest hour imported
+        self._imported = {}
+
+    @callback
+    def async_handle_update(self) -> None:
+        """Import the coordinator's data if it is from a new publication."""
+        coordinator = self.coordinator
+        hub = coordinator.hub
+        observed_at = hub.observed_at
+        if (
+            observed_at is None
+            or observed_at == self._observed_at
+            or not coordinator.last_update_success
+        ):
+            return
+        self._observed_at = observed_at
+
+        batches = 0
+        for city, key, value in coordinator.observed_values():
+            if key not in STATISTIC_KEYS:
+                continue
+            statistic_id = self._statistic_id(city, key)
+            since = self._imported.get(statistic_id, -math.inf)
+            field = FEED_FIELDS.get(key)
+            samples = []
+            if field in HISTORY_FIELDS and coordinator.point is None:
+                samples = hub.history.samples(city, field, since)
+            if not samples and value is not None:
+                samples = [(observed_at.timestamp(), value)]
+            statistics = hourly_statistics(samples)
+            if not statistics:
+                continue
+            async_add_external_statistics(
+                self.hass,
+                StatisticMetaData(
+                    has_mean=True,
+                    has_sum=False,
+                    name=f"{city} {AVAILABLE_SENSORS[key]}",
+                    source=DOMAIN,
+                    statistic_id=statistic_id,
+                    unit_of_measurement=SENSOR_TYPES[key]["unit"],
+                ),
+                statistics,
+            )
+            self._imported[statistic_id] = statistics[-1]["start"].timestamp()
+            batches += 1
+        _LOGGER.debug("Queued %d statistics batches for %s", batches, observed_at)
+
+    def _statistic_id(self, city: str, key: str) -> str:
+        """Return the external statistic id of a station's data key."""
+        station_id = f"{self._station_id}_{city}" if self._per_station else self._station_id
+        return f"{DOMAIN}:{slugify(station_id)}_{key}"
@@ -0,0 +1,297 @@
+"""Compact columnar table of station observations."""
+from array import array
+from collections.abc import Mapping
+import math
+import re
+from types import MappingProxyType
+
+# Feed fields stored as float64 columns, NaN marking a missing value.
+NUMERIC_FIELDS = ("Temp", "Vlaga", "Tlak", "TlakTend", "VjetarBrzina", "Lat", "Lon")
+# Feed fields stored as codes into the table's interned vocabulary.
+CODED_FIELDS = ("VjetarSmjer", "Vrijeme")
+
+# Data key -> feed field, as read through a StationRow.
+ROW_FIELDS = {
+    "temperature": "Temp",
+    "humidity": "Vlaga",
+    "pressure": "Tlak",
+    "pressure_tendency": "TlakTend",
+    "wind_speed": "VjetarBrzina",
+    "wind_direction": "VjetarSmjer",
+    "vrijeme": "Vrijeme",
+    "latitude": "Lat",
+    "longitude": "Lon",
+}
+# Meteorological quantities computed from each row, in ``derived``.
+QUANTITY_KEYS = ("dew_point", "apparent_temperature", "wind_chill", "heat_index")
+# Data keys computed from the table rather than read from a feed field.
+DERIVED_KEYS = ("condition", *QUANTITY_KEYS)
+
+# Keys of an Observation: the row keys plus values converted for entities.
+OBSERVATION_KEYS = (*ROW_FIELDS, *DERIVED_KEYS, "wind_bearing")
+# Compass point -> bearing in degrees; calm ("C") has none.
+WIND_BEARINGS = MappingProxyType({
+    "N": 0, "NNE": 22.5, "NE": 45, "ENE": 67.5,
+    "E": 90, "ESE": 112.5, "SE": 135, "SSE": 157.5,
+    "S": 180, "SSW": 202.5, "SW": 225, "WSW": 247.5,
+    "W": 270, "WNW": 292.5, "NW": 315, "NNW": 337.5,
+})
+
+_ANSI_RE = re.compile(r"\x1B\[[0-9;?]*[ -/]*[@-~]")
+_NON_NUMERIC_RE = re.compile(r"[^0-9+\-.,]")
+
+
+def clean_num(value) -> str:
+    """Normalize numeric string from XML (remove ANSI/control chars and symbols)."""
+    if value is None:
+        return ""
+    text = str(value).strip()
+    # Strip ANSI escape sequences and keep numeric-relevant characters only.
+    text = _ANSI_RE.sub("", text)
+    text = _NON_NUMERIC_RE.sub("", text)
+    # XML sometimes contains commas as decimal separators.
+    return text.replace(",", ".")
+
+
+def to_float(value) -> float:
+    """Convert XML numeric value to float, NaN if it is missing or invalid."""
+    text = clean_num(value)
+    if not text or text == "-":
+        return math.nan
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class StationTable:
+    """All stations of one feed fetch, stored column-wise.
+
+    Numeric fields live in ``array('d')`` columns and text fields as
+    ``array('H')`` codes into a vocabulary shared by all rows, so a
+    snapshot of the whole feed takes a few kilobytes. ``index`` resolves
+    a station name to its row in O(1). ``catalogue`` lists every station
+    in the feed, including those the parser was told to skip, with their
+    coordinates in ``catalogue_lat``/``catalogue_lon``.
+    ``conditions`` holds the HA condition of each row, ``derived`` the
+    QUANTITY_KEYS columns and ``virtual`` the data of interpolated points,
+    once the hub has computed them.
+    """
+
+    __slots__ = (
+        "names",
+        "index",
+        "numeric",
+        "coded",
+        "vocabulary",
+        "catalogue",
+        "catalogue_lat",
+        "catalogue_lon",
+        "conditions",
+        "derived",
+        "virtual",
+        "_codes",
+    )
+
+    def __init__(self):
+        """Initialize."""
+        self.names = []
+        self.catalogue = []
+        self.catalogue_lat = array("d")
+        self.catalogue_lon = array("d")
+        self.index = {}
+        self.numeric = {field: array("d") for field in NUMERIC_FIELDS}
+        self.coded = {field: array("H") for field in CODED_FIELDS}
+        # Code 0 is reserved for a missing value.
+        self.vocabulary = [None]
+        self._codes = {None: 0}
+        self.conditions = None
+        self.derived = {}
+        self.virtual = {}
+
+    def __len__(self) -> int:
+        """Return the number of stations."""
+        return len(self.names)
+
+    def __contains__(self, name) -> bool:
+        """Return whether a station is in the table."""
+        return name in self.index
+
+    def append(self, station: dict) -> None:
+        """Append a station given as raw feed text values."""
+        self.index[station["GradIme"]] = len(self.names)
+        self.names.append(station["GradIme"])
+        for field, column in self.numeric.items():
+            column.append(to_float(station.get(field)))
+        for field, column in self.coded.items():
+            column.append(self._intern(station.get(field)))
+
+    def add_to_catalogue(self, station: dict) -> None:
+        """List a station of the feed, whether or not it was kept."""
+        self.catalogue.append(station["GradIme"])
+        self.catalogue_lat.append(to_float(station.get("Lat")))
+        self.catalogue_lon.append(to_float(station.get("Lon")))
+
+    def _intern(self, value) -> int:
+        """Return the vocabulary code of a text value."""
+        value = (value or "").strip()
+        if value in ("", "-"):
+            value = None
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.vocabulary)
+            self.vocabulary.append(value)
+        return code
+
+    def number(self, row: int, field: str):
+        """Return a numeric value, or None if it is missing."""
+        value = self.numeric[field][row]
+        return None if math.isnan(value) else value
+
+    def text(self, row: int, field: str):
+        """Return a text value, or None if it is missing."""
+        return self.vocabulary[self.coded[field][row]]
+
+    def carry_forward(self, field: str, previous: "StationTable") -> None:
+        """Fill missing values of a numeric field from a previous table."""
+        column = self.numeric[field]
+        old_column = previous.numeric[field]
+        for row, value in enumerate(column):
+            if math.isnan(value):
+                old_row = previous.index.get(self.names[row])
+                if old_row is not None:
+                    column[row] = old_column[old_row]
+
+    def as_dict(self) -> dict:
+        """Return a JSON-serializable copy of the table."""
+        return {
+            "names": self.names,
+            "numeric": {
+                field: [None if math.isnan(value) else value for value in column]
+                for field, column in self.numeric.items()
+            },
+            "coded": {field: list(column) for field, column in self.coded.items()},
+            "vocabulary": self.vocabulary,
+            "catalogue": self.catalogue,
+            "catalogue_lat": [None if math.isnan(value) else value for value in self.catalogue_lat],
+            "catalogue_lon": [None if math.isnan(value) else value for value in self.catalogue_lon],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StationTable":
+        """Rebuild a table saved with as_dict."""
+        table = cls()
+        table.names = list(data["names"])
+        table.index = {name: row for row, name in enumerate(table.names)}
+        missing = [None] * len(table.names)
+        for field, column in table.numeric.items():
+            values = data["numeric"].get(field, missing)
+            column.extend(math.nan if value is None else value for value in values)
+        for field, column in table.coded.items():
+            column.extend(data["coded"].get(field, [0] * len(table.names)))
+        table.vocabulary = list(data["vocabulary"])
+        table._codes = {value: code for code, value in enumerate(table.vocabulary)}
+        table.catalogue = list(data.get("catalogue", table.names))
+        missing = [None] * len(table.catalogue)
+        for key in ("catalogue_lat", "catalogue_lon"):
+            getattr(table, key).extend(
+                math.nan if value is None else value for value in data.get(key, missing)
+            )
+        return table
+
+    def row(self, name: str):
+        """Return a view of a station's row, or None if it is not in the table."""
+        row = self.index.get(name)
+        return None if row is None else StationRow(self, row)
+
+
+class StationRow(Mapping):
+    """Read-only view of one station, keyed like the coordinator data dict."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: StationTable, row: int):
+        """Initialize."""
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        """Return the converted value of a data key."""
+        if key == "condition":
+            conditions = self._table.conditions
+            return None if conditions is None else conditions[self._row]
+        if key in QUANTITY_KEYS:
+            column = self._table.derived.get(key)
+            if column is None or math.isnan(column[self._row]):
+                return None
+            return round(column[self._row], 1)
+        field = ROW_FIELDS[key]
+        if field in CODED_FIELDS:
+            value = self._table.text(self._row, field)
+            if key == "vrijeme":
+                return value.lower() if value else ""
+            return value
+        value = self._table.number(self._row, field)
+        if key == "humidity" and value is not None:
+            return int(round(value))
+        return value
+
+    def __iter__(self):
+        """Iterate over the data keys."""
+        yield from ROW_FIELDS
+        yield from DERIVED_KEYS
+
+    def __len__(self) -> int:
+        """Return the number of data keys."""
+        return len(ROW_FIELDS) + len(DERIVED_KEYS)
+
+
+class Observation(Mapping):
+    """Immutable values of one station for one poll, ready for entities.
+
+    Built once per poll from a StationRow or an interpolated dict, with the
+    entity-facing conversions already done, so entity properties are plain
+    attribute reads. Also a Mapping keyed like the coordinator data dict.
+    """
+
+    __slots__ = OBSERVATION_KEYS
+
+    def __init__(self, values):
+        """Initialize from a mapping of data keys."""
+        set_value = object.__setattr__
+        for key in OBSERVATION_KEYS[:-1]:
+            set_value(self, key, values.get(key))
+        if self.pressure_tendency == 0:
+            # No "-0.0" hPa.
+            set_value(self, "pressure_tendency", 0.0)
+        set_value(self, "wind_bearing", WIND_BEARINGS.get(self.wind_direction))
+
+    def __setattr__(self, name, value):
+        """Refuse changes; observations are shared by all entities of a city."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        """Refuse changes; observations are shared by all entities of a city."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, key):
+        """Return the value of a data key."""
+        if key not in _OBSERVATION_KEY_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        """Iterate over the data keys."""
+        return iter(OBSERVATION_KEYS)
+
+    def __len__(self) -> int:
+        """Return the number of data keys."""
+        return len(OBSERVATION_KEYS)
+
+    def __repr__(self) -> str:
+        """Return the values for debugging."""
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+_OBSERVATION_KEY_SET = frozenset(OBSERVATION_KEYS)
+EMPTY_OBSERVATION = Observation({})
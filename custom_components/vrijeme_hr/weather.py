@@ -1,10 +1,12 @@
 """Weather platform for Vrijeme HR integration."""
-from homeassistant.components.weather import WeatherEntity
+from homeassistant.components.weather import Forecast, WeatherEntity, WeatherEntityFeature
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, get_weather_condition
+from .const import CONF_COUNTRY, DEFAULT_COUNTRY, DOMAIN, WEATHER_ENTITY_KEYS, get_station_id
+from .coordinator import async_get_forecast_hub
+from .table import EMPTY_OBSERVATION
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up Vrijeme HR weather platform."""
@@ -16,67 +18,126 @@ class VrijemeHrvatskaEntity(CoordinatorEntity, WeatherEntity):
 
     def __init__(self, coordinator, config):
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=tuple(WEATHER_ENTITY_KEYS))
         self._config = config
-        self._attr_unique_id = f"vrijeme_hr_{config['city']}"
+        station_id = get_station_id(config)
+        self._attr_unique_id = f"vrijeme_hr_{station_id}"
         self._attr_name = f"Vrijeme HR {config['city']}"
+        if config.get(CONF_COUNTRY, DEFAULT_COUNTRY) == DEFAULT_COUNTRY:
+            # The DHMZ forecast only covers places in Croatia.
+            self._attr_supported_features = (
+                WeatherEntityFeature.FORECAST_HOURLY | WeatherEntityFeature.FORECAST_DAILY
+            )
         
         # Add device info
         self._attr_device_info = {
-            "identifiers": {(DOMAIN, config['city'])},
+            "identifiers": {(DOMAIN, station_id)},
             "name": f"Vrijeme HR {config['city']}",
             "manufacturer": "DHMZ",
             "model": "Weather Station",
             "configuration_url": "https://meteo.hr/",
         }
 
+    # Set while the entity is added and offers forecasts.
+    _forecast_hub = None
+
+    async def async_added_to_hass(self) -> None:
+        """Push forecasts to subscribers whenever the forecast cache changes."""
+        await super().async_added_to_hass()
+        if self.supported_features:
+            self._forecast_hub = async_get_forecast_hub(self.hass)
+            self.async_on_remove(self._forecast_hub.async_subscribe(self._async_push_forecasts))
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Forget the forecast hub, which goes away with its last entity."""
+        await super().async_will_remove_from_hass()
+        self._forecast_hub = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the new observation; prompt a forecast revalidation once expired.
+
+        Unexpired forecasts are only pushed when the hub's data changes.
+        Once it expires, subscribers are asked to re-read, which fetches;
+        without subscribers Home Assistant reads nothing and nothing is
+        downloaded.
+        """
+        super()._handle_coordinator_update()
+        if self._forecast_hub is not None and not self._forecast_hub.fresh:
+            self._async_push_forecasts()
+
+    @callback
+    def _async_push_forecasts(self) -> None:
+        """Have Home Assistant re-read forecasts, if anything subscribes to them."""
+        self.hass.async_create_task(self.async_update_listeners(None))
+
+    async def _async_forecast(self, kind: str) -> list[Forecast] | None:
+        """Return the forecast of the place nearest the station.
+
+        Only called while a forecast is subscribed to or requested; the
+        feed is downloaded only when the shared cache has expired.
+        """
+        hub = self._forecast_hub
+        if hub is None:
+            return None
+        await hub.async_ensure_fresh()
+        observation = self._observation
+        return hub.forecast(observation.latitude, observation.longitude, kind)
+
+    async def async_forecast_hourly(self) -> list[Forecast] | None:
+        """Return the hourly forecast."""
+        return await self._async_forecast("hourly")
+
+    async def async_forecast_daily(self) -> list[Forecast] | None:
+        """Return the daily forecast."""
+        return await self._async_forecast("daily")
+
+    @property
+    def extra_state_attributes(self):
+        """Flag data the last poll could not confirm."""
+        return self.coordinator.stale_attributes
+
+    @property
+    def _observation(self):
+        """Return the current Observation, empty before the first update."""
+        return self.coordinator.data or EMPTY_OBSERVATION
+
     @property
     def condition(self):
         """Return current condition."""
-        if not self.coordinator.data:
-            return None
-        vrijeme = self.coordinator.data.get("vrijeme", "")
-        return get_weather_condition(vrijeme)
+        return self._observation.condition
 
     @property
     def native_temperature(self):
         """Return the current temperature."""
-        if not self.coordinator.data:
-            return None
-        return self.coordinator.data.get("temperature")
+        return self._observation.temperature
 
     @property
     def native_pressure(self):
         """Return the current pressure."""
-        if not self.coordinator.data:
-            return None
-        return self.coordinator.data.get("pressure")
+        return self._observation.pressure
 
     @property
     def humidity(self):
         """Return the current humidity."""
-        if not self.coordinator.data:
-            return None
-        return self.coordinator.data.get("humidity")
+        return self._observation.humidity
+
+    @property
+    def native_apparent_temperature(self):
+        """Return the apparent temperature."""
+        return self._observation.apparent_temperature
+
+    @property
+    def native_dew_point(self):
+        """Return the dew point."""
+        return self._observation.dew_point
 
     @property
     def native_wind_speed(self):
         """Return the current wind speed."""
-        if not self.coordinator.data:
-            return None
-        return self.coordinator.data.get("wind_speed")
+        return self._observation.wind_speed
 
     @property
     def wind_bearing(self):
         """Return the current wind bearing."""
-        if not self.coordinator.data:
-            return None
-        value = self.coordinator.data.get("wind_direction")
-        direction_map = {
-            "N": 0, "NNE": 22.5, "NE": 45, "ENE": 67.5,
-            "E": 90, "ESE": 112.5, "SE": 135, "SSE": 157.5,
-            "S": 180, "SSW": 202.5, "SW": 225, "WSW": 247.5,
-            "W": 270, "WNW": 292.5, "NW": 315, "NNW": 337.5,
-            "C": None
-        }
-        return direction_map.get(value, None)
+        return self._observation.wind_bearing